@@ -1,5 +1,6 @@
 
 import os
+from typing import Literal
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -11,6 +12,16 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-key-change-it")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing (app.core.security). Changing the cost rehashes each user on their next login.
+    BCRYPT_ROUNDS: int = 12
+    # Max concurrent bcrypt operations. Half the cores by default, so a login burst leaves CPU for everything else.
+    PASSWORD_HASH_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)
+
+    # Identity cache for deps.get_current_user (app.core.identity_cache).
+    # Writes invalidate it in-process; other workers see changes after the TTL. 0 disables it.
+    IDENTITY_CACHE_TTL_SECONDS: float = 60
+    IDENTITY_CACHE_MAX_ENTRIES: int = 1024
     
     # Database
     MYSQL_USER: str = os.getenv("MYSQL_USER", "root")
@@ -19,6 +30,21 @@ class Settings(BaseSettings):
     MYSQL_PORT: str = os.getenv("MYSQL_PORT", "3306")
     MYSQL_DB: str = os.getenv("MYSQL_DB", "tomato_db")
     USE_SQLITE: bool = True # Force SQLite for local dev
+    SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "./sql_app.db")
+
+    # SQLite profile, applied to every new connection (see app.db.session)
+    SQLITE_JOURNAL_MODE: str = "WAL" # Readers don't block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL" # Safe with WAL, fewer fsyncs
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000 # Wait for the writer lock instead of "database is locked"
+    SQLITE_CACHE_SIZE: int = -64000 # Negative = KiB, so ~64 MB page cache
+    SQLITE_MMAP_SIZE: int = 268435456 # 256 MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    # update_project recreates budget lines that invoices still point to, so enforcing
+    # foreign keys would reject edits of invoiced projects. Enable once that is fixed.
+    SQLITE_FOREIGN_KEYS: bool = False
+    SQLITE_AUTO_VACUUM: str = "INCREMENTAL" # Only takes effect on new databases (or after VACUUM)
+    SQLITE_MAINTENANCE_INTERVAL_HOURS: float = 24 # PRAGMA optimize / ANALYZE / incremental_vacuum
+    SQLITE_INCREMENTAL_VACUUM_PAGES: int = 0 # 0 = free every unused page
 
     # Email
     MAIL_USERNAME: str = os.getenv("MAIL_USERNAME", "")
@@ -28,11 +54,46 @@ class Settings(BaseSettings):
     MAIL_SERVER: str = os.getenv("MAIL_SERVER", "smtp.gmail.com")
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
+
+    # Per-request SQL profiling (app.core.profiling), shown at /admin/perf
+    PERF_PROFILING_ENABLED: bool = True
+    PERF_SERVER_TIMING: bool = True # Server-Timing header with DB time and query count
+    PERF_RING_BUFFER_SIZE: int = 200 # Requests kept in memory
+    PERF_N_PLUS_ONE_THRESHOLD: int = 10 # Same SELECT this many times in one request = likely N+1
+
+    # Calendar delta sync (/calendar/events/changes, app.utils.calendar_changes)
+    CALENDAR_CHANGES_RETENTION_DAYS: int = 7 # Older cursors get a full reload
+    CALENDAR_CHANGES_MAX: int = 500 # More changed schedules than this = full reload
+    CALENDAR_CHANGES_SETTLE_SECONDS: int = 5 # MySQL only: cursor stays behind entries this young (ids are not assigned in commit order)
+    CALENDAR_MAX_BULK_SCHEDULES: int = 20000 # Schedules one create_schedule call may insert (days x workers)
+    CALENDAR_DOUBLE_BOOKING_POLICY: Literal["reject", "warn", "allow"] = "warn" # Same worker twice a day: reject (409), warn (create + message) or allow
+
+    # Payroll: approval feed and draft periods (app.utils.payroll_entries)
+    PAYROLL_APPROVAL_PAGE_SIZE: int = 500 # Rows per /payroll/schedules page (approval feed)
+    PAYROLL_APPROVAL_MAX_PAGE_SIZE: int = 5000 # Upper bound for ?limit=
+    PAYROLL_AUTO_RECOMPUTE: bool = False # Recompute affected entries as soon as hours change instead of marking them stale
+
+    # Vacation ledger (app.utils.vacations)
+    VACATION_DAYS_PER_MONTH: float = 1.0 # Days accrued per full month worked
+    VACATION_ACCRUAL_INTERVAL_HOURS: float = 24 # Accrual job; only completed months are added
+
+    # Background Jobs (app.core.scheduler)
+    SCHEDULER_ENABLED: bool = True # Disable when another process runs the jobs
+    JOB_POOL_WORKERS: int = 2 # Threads for submitted jobs (payroll generation, app.core.job_pool)
+    PAYROLL_JOB_STALE_MINUTES: float = 30 # A job 'running' longer than this is treated as abandoned and resumed on startup
+    OVERDUE_SWEEP_INTERVAL_HOURS: float = 24
     
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         if self.USE_SQLITE:
-            return "sqlite:///./sql_app.db"
+            return f"sqlite:///{self.SQLITE_DB_PATH}"
         return f"mysql+mysqlconnector://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
 
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self) -> str:
+        # Same database through async drivers, used by app.db.session.async_engine
+        if self.USE_SQLITE:
+            return f"sqlite+aiosqlite:///{self.SQLITE_DB_PATH}"
+        return f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+
 settings = Settings()
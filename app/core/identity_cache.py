@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.db.models.user import User
+
+
+class IdentityCache:
+    """
+    Bounded LRU + TTL cache of User rows by token subject (username), used by
+    deps.get_current_user so authenticated requests skip the users SELECT.
+
+    Every subject has a version stamp. invalidate() bumps it, so an entry stored
+    by a request that read the row *before* the write can never be served after it.
+    Invalidation is per process: with several workers, the others pick up the
+    change when their entry expires (IDENTITY_CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[int, float, User]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, subject: str) -> int:
+        with self._lock:
+            return self._versions.get(subject, 0)
+
+    def get(self, subject: str) -> Optional[User]:
+        """
+        Returns a detached User snapshot, or None on miss/expiry.
+        Callers must merge(..., load=False) it into their session, never use it directly.
+        """
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            version, expires_at, user = entry
+            if version != self._versions.get(subject, 0) or expires_at < time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return user
+
+    def put(self, subject: str, version: int, user: User):
+        """
+        Stores a snapshot of `user`. `version` must be read with version() *before*
+        the row was loaded; stale versions are dropped.
+        """
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        snapshot = _detached_copy(user)
+        with self._lock:
+            if version != self._versions.get(subject, 0):
+                return
+            self._entries[subject] = (version, time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *subjects: str):
+        with self._lock:
+            for subject in subjects:
+                if subject is None:
+                    continue
+                self._versions[subject] = self._versions.get(subject, 0) + 1
+                self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            for subject in self._entries:
+                self._versions[subject] = self._versions.get(subject, 0) + 1
+            self._entries.clear()
+
+
+def _detached_copy(user: User) -> User:
+    # Column values only: relationships stay unloaded and lazy-load once merged into a session
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+identity_cache = IdentityCache(
+    max_entries=settings.IDENTITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.IDENTITY_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(*usernames: str):
+    """Call after committing any change to a user's row (role, status, password, deletion)."""
+    identity_cache.invalidate(*usernames)
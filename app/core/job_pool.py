@@ -0,0 +1,25 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+# Worker pool for jobs submitted by requests (as opposed to the periodic jobs in
+# app.core.scheduler). Jobs run off the event loop, open their own Session and
+# persist their own status, so a request only has to enqueue and return.
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def submit(func: Callable, *args) -> Future:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.JOB_POOL_WORKERS, thread_name_prefix="job-pool")
+    return _executor.submit(func, *args)
+
+
+def shutdown_pool():
+    """Waits for running jobs; queued ones stay 'queued' and resume on the next startup."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,138 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+# Per-request SQL profiling: counts statements and DB time for each request,
+# groups them by fingerprint to spot N+1 patterns, adds a Server-Timing header
+# and keeps the last requests in memory for /admin/perf.
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.started_at = datetime.utcnow()
+        self.status_code: Optional[int] = None
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.statements = 0
+        self.fingerprints: Counter = Counter()
+        self.fingerprint_ms: Dict[str, float] = {}
+        self._lock = threading.Lock() # Sync dependencies run on threadpool threads
+
+    def record(self, statement: str, duration_ms: float):
+        fingerprint = fingerprint_sql(statement)
+        with self._lock:
+            self.statements += 1
+            self.db_ms += duration_ms
+            self.fingerprints[fingerprint] += 1
+            self.fingerprint_ms[fingerprint] = self.fingerprint_ms.get(fingerprint, 0.0) + duration_ms
+
+    @property
+    def repeated(self) -> List[dict]:
+        """Fingerprints executed more than once, most repeated first."""
+        return [
+            {"sql": sql, "count": count, "ms": self.fingerprint_ms[sql]}
+            for sql, count in self.fingerprints.most_common()
+            if count > 1
+        ]
+
+    @property
+    def n_plus_one(self) -> List[dict]:
+        """Likely N+1: the same SELECT repeated PERF_N_PLUS_ONE_THRESHOLD times or more."""
+        return [
+            r for r in self.repeated
+            if r["count"] >= settings.PERF_N_PLUS_ONE_THRESHOLD and r["sql"].startswith("SELECT")
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_ms:.1f};desc="{self.statements} queries"'
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+recent_profiles: Deque[RequestProfile] = deque(maxlen=settings.PERF_RING_BUFFER_SIZE)
+
+_whitespace = re.compile(r"\s+")
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r"\b\d+(?:\.\d+)?\b")
+_in_list = re.compile(r"\bIN \((?:\?|__\[POSTCOMPILE_\w+\])(?:, ?\?)*\)", re.IGNORECASE)
+
+
+def fingerprint_sql(statement: str) -> str:
+    """Normalizes a statement so calls differing only in parameters group together."""
+    sql = _whitespace.sub(" ", statement).strip()
+    sql = _string_literal.sub("?", sql)
+    sql = _number_literal.sub("?", sql)
+    return _in_list.sub("IN (?)", sql)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info["profiling_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = conn.info.pop("profiling_start", None)
+    if profile is None or started is None:
+        return
+    profile.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def instrument_engine(engine: Engine):
+    """Hooks the profiler into an engine (for async engines pass engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware that opens a RequestProfile per HTTP request.
+
+    The Server-Timing header reflects the queries run before the response
+    started; queries issued while a streaming body is sent still end up in
+    recent_profiles.
+    """
+
+    def __init__(self, app, skip_prefixes=("/static", "/cotizador")):
+        self.app = app
+        self.skip_prefixes = skip_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if settings.PERF_SERVER_TIMING:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", f"{profile.server_timing()}, app;dur={elapsed:.1f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            profile.total_ms = (time.perf_counter() - start) * 1000
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                profile.route = route.path
+            recent_profiles.append(profile)
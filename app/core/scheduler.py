@@ -0,0 +1,86 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+from app.db.models.job import JobRun
+
+
+class ScheduledJob:
+    """
+    A periodic in-process job.
+
+    `func` receives a fresh Session and returns the number of rows it affected
+    (or None). It runs in the threadpool so it never blocks the event loop.
+    """
+
+    def __init__(self, name: str, func: Callable[[Session], Optional[int]], interval: timedelta, run_at_startup: bool = True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_at_startup = run_at_startup
+
+
+_jobs: List[ScheduledJob] = []
+_tasks: List[asyncio.Task] = []
+
+
+def register_job(name: str, func: Callable[[Session], Optional[int]], interval: timedelta, run_at_startup: bool = True):
+    _jobs.append(ScheduledJob(name, func, interval, run_at_startup))
+
+
+def run_job(job: ScheduledJob):
+    """
+    Runs a job once and records its last run time, duration and affected rows in job_runs.
+    """
+    db = SessionLocal()
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+    rows, status, error = None, "ok", None
+    try:
+        rows = job.func(db)
+    except Exception as e:
+        print(f"Scheduled job {job.name} failed: {e}")
+        db.rollback()
+        status, error = "error", str(e)
+
+    try:
+        run = db.query(JobRun).get(job.name)
+        if not run:
+            run = JobRun(name=job.name)
+            db.add(run)
+        run.last_run_at = started_at
+        run.duration_ms = (time.perf_counter() - start) * 1000
+        run.rows_affected = rows
+        run.status = status
+        run.error = error
+        db.commit()
+    except Exception as e:
+        print(f"Error recording job run for {job.name}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _job_loop(job: ScheduledJob):
+    if not job.run_at_startup:
+        await asyncio.sleep(job.interval.total_seconds())
+    while True:
+        await run_in_threadpool(run_job, job)
+        await asyncio.sleep(job.interval.total_seconds())
+
+
+def start_scheduler():
+    for job in _jobs:
+        _tasks.append(asyncio.create_task(_job_loop(job)))
+
+
+async def stop_scheduler():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -6,11 +6,13 @@ from app.db.models.user import User  # This causes circular import if User impor
 # Ideally, we import them in main or a separate 'models' init, but putting it here (bottom) or in main is key.
 from app.db.models.project import Project
 from app.db.models.log import DailyLog, Photo
-from app.db.models.schedule import ProjectSchedule
+from app.db.models.schedule import ProjectSchedule, ScheduleSeries, SeriesTask, ScheduleTaskCompletion, CalendarDayStamp, CalendarChange
 from app.db.models.project_details import ProjectSupply, ProjectTask
 from app.db.models.log_task import DailyLogTask
-from app.db.models.finance import ProjectBudget, BudgetLine, Invoice, Payment
+from app.db.models.finance import ProjectBudget, BudgetLine, Invoice, Payment, ProjectFinancialSummary
 from app.db.models.activity import ActivityLog
-from app.db.models.payroll import PayrollPeriod, PayrollEntry
+from app.db.models.payroll import PayrollPeriod, PayrollEntry, PayrollDirtyCell, PayrollJob, AguinaldoAccrual
 from app.db.models.payment import PayrollPayment
 from app.db.models.liquidation import Liquidation
+from app.db.models.vacation import VacationEntry, VacationBalance
+from app.db.models.job import JobRun
@@ -0,0 +1,180 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, text, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.utils.aguinaldo import rebuild_accruals
+
+# Versioned schema migrations. create_all() still builds missing tables (and their
+# indexes) on startup; these migrations bring *existing* tables up to date.
+# Every step must be idempotent and work on both SQLite and MySQL.
+#
+# To add a migration: write a function taking a Connection and append it to
+# MIGRATIONS with the next version number. Never renumber or edit applied ones.
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime),
+)
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    columns = [c["name"] for c in inspect(conn).get_columns(table)]
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        print(f"  Added {table}.{column}")
+
+
+def create_index(conn: Connection, table: str, name: str, columns: List[str], sqlite_where: Optional[str] = None):
+    """
+    CREATE INDEX unless an index with that name already exists on the table.
+    sqlite_where makes it partial on SQLite; MySQL has no partial indexes and gets a full one.
+    """
+    existing = [i["name"] for i in inspect(conn).get_indexes(table)]
+    if name not in existing:
+        where = f" WHERE {sqlite_where}" if sqlite_where and conn.dialect.name == "sqlite" else ""
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)}){where}"))
+        print(f"  Created index {name}")
+
+
+def drop_index(conn: Connection, table: str, name: str):
+    """DROP INDEX if the table has it."""
+    existing = [i["name"] for i in inspect(conn).get_indexes(table)]
+    if name in existing:
+        on_table = f" ON {table}" if conn.dialect.name == "mysql" else ""
+        conn.execute(text(f"DROP INDEX {name}{on_table}"))
+        print(f"  Dropped index {name}")
+
+
+def _legacy_columns(conn: Connection):
+    # Columns previously added by hand with update_db.py, universal_migration.py,
+    # update_*_schema.py, add_overtime*.py and migrate_payment.py
+    add_column(conn, "users", "phone", "VARCHAR(20)")
+    add_column(conn, "users", "email", "VARCHAR(100)")
+    add_column(conn, "users", "start_date", "DATE")
+    add_column(conn, "users", "hourly_rate", "FLOAT DEFAULT 0.0")
+    add_column(conn, "users", "monthly_salary", "FLOAT DEFAULT 0.0")
+    add_column(conn, "users", "status", "VARCHAR(20) DEFAULT 'active'")
+    add_column(conn, "users", "apply_deductions", "BOOLEAN DEFAULT 1")
+    add_column(conn, "users", "payment_method", "VARCHAR(20) DEFAULT 'Efectivo'")
+    add_column(conn, "users", "account_number", "VARCHAR(50)")
+    add_column(conn, "project_schedules", "hours_worked", "FLOAT DEFAULT 8.0")
+    add_column(conn, "project_schedules", "overtime_hours", "FLOAT DEFAULT 0.0")
+    add_column(conn, "project_schedules", "is_confirmed", "BOOLEAN DEFAULT 0")
+    add_column(conn, "payroll_entries", "overtime_hours", "FLOAT DEFAULT 0.0")
+    add_column(conn, "payroll_entries", "apply_deductions", "BOOLEAN DEFAULT 1")
+    add_column(conn, "payroll_payments", "overtime_hours", "FLOAT DEFAULT 0.0")
+    add_column(conn, "project_budgets", "start_date", "DATE")
+    add_column(conn, "project_budgets", "end_date", "DATE")
+    add_column(conn, "project_budgets", "active_prorogue", "BOOLEAN DEFAULT 0")
+    add_column(conn, "invoices", "note", "TEXT")
+
+
+def _hot_query_indexes(conn: Connection):
+    # Keep in sync with the Index() declarations in the models (used by create_all)
+    create_index(conn, "daily_logs", "ix_daily_logs_project_date_created", ["project_id", "date", "created_at"])
+    create_index(conn, "invoices", "ix_invoices_budget_status_due", ["budget_id", "status", "due_date"])
+    create_index(conn, "invoices", "ix_invoices_issue_date", ["issue_date"])
+    create_index(conn, "project_schedules", "ix_project_schedules_user_date", ["user_id", "date"])
+    create_index(conn, "project_schedules", "ix_project_schedules_project_date_confirmed", ["project_id", "date", "is_confirmed"])
+    create_index(conn, "payroll_entries", "ix_payroll_entries_period_user", ["payroll_period_id", "user_id"])
+    create_index(conn, "payroll_payments", "ix_payroll_payments_user_date", ["user_id", "date"])
+    create_index(conn, "activity_logs", "ix_activity_logs_created_at", ["created_at"])
+    create_index(conn, "project_users", "ix_project_users_user_id", ["user_id"])
+
+
+def _schedule_series(conn: Connection):
+    # New tables come from create_all; existing schedules just get the (nullable) link
+    add_column(conn, "project_schedules", "series_id", "INTEGER REFERENCES schedule_series(id)")
+    create_index(conn, "project_schedules", "ix_project_schedules_series_id", ["series_id"])
+
+
+def _payroll_snapshot(conn: Connection):
+    add_column(conn, "payroll_periods", "totals", "JSON")
+    for column in ("regular_amount", "overtime_amount", "cs_empresa", "previsiones", "company_cost"):
+        add_column(conn, "payroll_entries", column, "FLOAT")
+
+
+def _approval_feed_index(conn: Connection):
+    create_index(conn, "project_schedules", "ix_project_schedules_confirmed_date", ["is_confirmed", "date"])
+
+
+def _aguinaldo_accruals(conn: Connection):
+    # The table comes from create_all; fill it from periods finalized before it existed
+    with Session(bind=conn) as db:
+        rebuild_accruals(db)
+
+
+def _calendar_day_stamps(conn: Connection):
+    # Days scheduled before calendar_day_stamps existed have no row, so their range
+    # stamp stays (0, 0) and touch_all_calendar_days (an UPDATE) never moves it
+    conn.execute(text(
+        "INSERT INTO calendar_day_stamps (day, stamp) "
+        "SELECT DISTINCT s.date, 1 FROM project_schedules s "
+        "WHERE s.date IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM calendar_day_stamps c WHERE c.day = s.date)"
+    ))
+
+
+def _unconfirmed_feed_index(conn: Connection):
+    # (is_confirmed, date) from migration 5 won the project/range/confirmed query from
+    # ix_project_schedules_project_date_confirmed on SQLite
+    drop_index(conn, "project_schedules", "ix_project_schedules_confirmed_date")
+    create_index(
+        conn, "project_schedules", "ix_project_schedules_unconfirmed_date", ["date DESC", "user_id", "id"],
+        sqlite_where="is_confirmed = 0"
+    )
+
+
+MIGRATIONS = [
+    (1, "Legacy columns from ad-hoc update scripts", _legacy_columns),
+    (2, "Composite indexes for hot query shapes", _hot_query_indexes),
+    (3, "Schedule series link on project_schedules", _schedule_series),
+    (4, "Payroll totals snapshot on finalization", _payroll_snapshot),
+    (5, "Index for the unconfirmed approval feed", _approval_feed_index),
+    (6, "Aguinaldo accruals from finalized payrolls", _aguinaldo_accruals),
+    (7, "Calendar day stamps for days scheduled before them", _calendar_day_stamps),
+    (8, "Partial index for the unconfirmed approval feed", _unconfirmed_feed_index),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Applies pending migrations in order, recording each one in schema_migrations.
+
+    :return: Versions applied by this call
+    """
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    newly_applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+
+        print(f"Applying migration {version}: {description}")
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker recorded this version first; its steps are idempotent
+            print(f"Migration {version} already recorded by another process")
+            continue
+        newly_applied.append(version)
+
+    return newly_applied
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy import Table, Column, Integer, ForeignKey, Index
 from app.db.base_class import Base
 
 project_users = Table(
@@ -7,4 +7,6 @@ project_users = Table(
     Base.metadata,
     Column("project_id", Integer, ForeignKey("projects.id"), primary_key=True),
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    # The primary key only serves project_id lookups
+    Index("ix_project_users_user_id", "user_id"),
 )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date, Enum, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date, Enum, DateTime, Index
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import func
 import enum
@@ -61,6 +61,12 @@ class BudgetLine(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Per-budget listings filtered by status and the overdue sweep
+        Index("ix_invoices_budget_status_due", "budget_id", "status", "due_date"),
+        # Dashboard date-range filters
+        Index("ix_invoices_issue_date", "issue_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     budget_id = Column(Integer, ForeignKey("project_budgets.id"), nullable=False)
@@ -92,3 +98,17 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     invoice = relationship("Invoice", back_populates="payment")
+
+class ProjectFinancialSummary(Base):
+    __tablename__ = "project_financial_summaries"
+
+    # Denormalized totals, maintained by the finance/project write paths
+    # (see app.utils.finance_summary) so reads don't re-scan invoices.
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+
+    total_adjudicated = Column(Float, default=0.0) # Lines with tax + active prorogue
+    total_invoiced = Column(Float, default=0.0)
+    total_paid = Column(Float, default=0.0)
+    balance = Column(Float, default=0.0) # Adjudicated - Invoiced
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,14 @@
+
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from app.db.base_class import Base
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    # One row per scheduled job (see app.core.scheduler), overwritten on each run
+    name = Column(String(50), primary_key=True)
+    last_run_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Float, default=0.0)
+    rows_affected = Column(Integer, nullable=True)
+    status = Column(String(20), default="ok") # ok, error
+    error = Column(Text, nullable=True)
@@ -1,11 +1,15 @@
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class DailyLog(Base):
     __tablename__ = "daily_logs"
+    __table_args__ = (
+        # Project log listings: filter by project, newest first
+        Index("ix_daily_logs_project_date_created", "project_id", "date", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
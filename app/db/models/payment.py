@@ -1,11 +1,15 @@
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class PayrollPayment(Base):
     __tablename__ = "payroll_payments"
+    __table_args__ = (
+        # Payment history and "latest payment" lookups per worker
+        Index("ix_payroll_payments_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, Boolean, Index, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -11,12 +11,17 @@ class PayrollPeriod(Base):
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     status = Column(String(20), default="draft") # draft, final
+    totals = Column(JSON, nullable=True) # Snapshot taken when finalized
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     entries = relationship("PayrollEntry", back_populates="period", cascade="all, delete-orphan")
+    dirty_cells = relationship("PayrollDirtyCell", cascade="all, delete-orphan")
 
 class PayrollEntry(Base):
     __tablename__ = "payroll_entries"
+    __table_args__ = (
+        Index("ix_payroll_entries_period_user", "payroll_period_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     payroll_period_id = Column(Integer, ForeignKey("payroll_periods.id"), nullable=False)
@@ -30,5 +35,50 @@ class PayrollEntry(Base):
     apply_deductions = Column(Boolean, default=True)
     details = Column(JSON, nullable=True) # Breakdown
 
+    # Derived amounts, persisted when the period is finalized (NULL while draft)
+    regular_amount = Column(Float, nullable=True)
+    overtime_amount = Column(Float, nullable=True)
+    cs_empresa = Column(Float, nullable=True)
+    previsiones = Column(Float, nullable=True)
+    company_cost = Column(Float, nullable=True)
+
     period = relationship("PayrollPeriod", back_populates="entries")
     user = relationship("User")
+
+class PayrollDirtyCell(Base):
+    """(worker, day) of a draft period whose hours changed after it was generated."""
+    __tablename__ = "payroll_dirty_cells"
+
+    payroll_period_id = Column(Integer, ForeignKey("payroll_periods.id"), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    date = Column(Date, primary_key=True)
+
+
+class PayrollJob(Base):
+    """Payroll generation submitted from /payroll/generate, run by app.core.job_pool."""
+    __tablename__ = "payroll_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), default="generate")
+    status = Column(String(20), default="queued") # queued, running, done, failed
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    payroll_period_id = Column(Integer, ForeignKey("payroll_periods.id", ondelete="SET NULL"), nullable=True) # Result
+    processed_users = Column(Integer, default=0)
+    elapsed_ms = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class AguinaldoAccrual(Base):
+    """Gross salary from finalized payrolls per worker and aguinaldo year (Dec 1 - Nov 30)."""
+    __tablename__ = "aguinaldo_accruals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True) # Year the aguinaldo is paid (December)
+    gross_total = Column(Float, default=0.0)
+    periods = Column(Integer, default=0) # Finalized periods counted
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,11 +1,24 @@
 
-from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, String, Boolean, Float
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, String, Boolean, Float, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class ProjectSchedule(Base):
     __tablename__ = "project_schedules"
+    __table_args__ = (
+        # Worker calendars and per-worker payroll ranges
+        Index("ix_project_schedules_user_date", "user_id", "date"),
+        # Approval feed and payroll generation by project/range/confirmation
+        Index("ix_project_schedules_project_date_confirmed", "project_id", "date", "is_confirmed"),
+        # "Unconfirmed only" approval feed across projects, in its keyset order. Partial
+        # on SQLite (MySQL ignores sqlite_where) so the planner never takes it for the
+        # project/range query above
+        Index(
+            "ix_project_schedules_unconfirmed_date", text("date DESC"), "user_id", "id",
+            sqlite_where=text("is_confirmed = 0")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -14,11 +27,16 @@ class ProjectSchedule(Base):
     hours_worked = Column(Float, default=8.0)
     overtime_hours = Column(Float, default=0.0)
     is_confirmed = Column(Boolean, default=False)
+    series_id = Column(Integer, ForeignKey("schedule_series.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     project = relationship("Project")
     user = relationship("User")
+    # Days created from a range take their tasks from the series template; tasks
+    # holds per-day tasks (single days edited on their own, and older assignments)
     tasks = relationship("ScheduleTask", back_populates="schedule", cascade="all, delete-orphan")
+    series = relationship("ScheduleSeries", back_populates="schedules")
+    completions = relationship("ScheduleTaskCompletion", cascade="all, delete-orphan")
 
 class ScheduleTask(Base):
     __tablename__ = "schedule_tasks"
@@ -30,3 +48,58 @@ class ScheduleTask(Base):
     completed = Column(Boolean, default=False)
 
     schedule = relationship("ProjectSchedule", back_populates="tasks")
+
+class ScheduleSeries(Base):
+    # One assignment over a range (create_schedule): holds the task template once
+    # for all its days (app.utils.schedule_series)
+    __tablename__ = "schedule_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    schedules = relationship("ProjectSchedule", back_populates="series")
+    tasks = relationship("SeriesTask", back_populates="series", cascade="all, delete-orphan", order_by="SeriesTask.position")
+
+class SeriesTask(Base):
+    __tablename__ = "schedule_series_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    series_id = Column(Integer, ForeignKey("schedule_series.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0)
+    title = Column(String(100), nullable=True)
+    description = Column(String(255), nullable=False)
+
+    series = relationship("ScheduleSeries", back_populates="tasks")
+
+class ScheduleTaskCompletion(Base):
+    # Per-day state of a series task: a row exists only while it is done that day
+    __tablename__ = "schedule_task_completions"
+
+    schedule_id = Column(Integer, ForeignKey("project_schedules.id"), primary_key=True)
+    series_task_id = Column(Integer, ForeignKey("schedule_series_tasks.id"), primary_key=True, index=True)
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CalendarDayStamp(Base):
+    # Change counter per calendar day, bumped by every write that changes what
+    # /calendar/events returns for that day (app.utils.calendar_stamps).
+    # Rows are never deleted, so removing a schedule bumps the stamp too.
+    __tablename__ = "calendar_day_stamps"
+
+    day = Column(Date, primary_key=True)
+    stamp = Column(Integer, nullable=False, default=0)
+
+class CalendarChange(Base):
+    # Append-only journal of calendar writes for /calendar/events/changes.
+    # id is the sync cursor; AUTOINCREMENT so SQLite never reuses ids after pruning.
+    # No FK on schedule_id: delete entries outlive their schedule.
+    __tablename__ = "calendar_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False) # schedule, task, calendar (reset: names changed)
+    entity_id = Column(Integer, nullable=True)
+    action = Column(String(20), nullable=False) # create, update, delete, reset
+    schedule_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True, index=True) # Worker owning the schedule, for worker feeds
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class VacationEntry(Base):
+    """Vacation ledger: accruals add days, usage, payouts and adjustments take them (signed days)."""
+    __tablename__ = "vacation_ledger"
+    __table_args__ = (
+        Index("ix_vacation_ledger_user_date", "user_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(20), nullable=False) # accrual, usage, payout, adjustment
+    date = Column(Date, nullable=False) # Accruals: last day of the month accrued
+    days = Column(Float, nullable=False)
+    notes = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    user = relationship("User", foreign_keys=[user_id])
+
+class VacationBalance(Base):
+    """Running totals of a worker's ledger, kept in the same transaction as its entries."""
+    __tablename__ = "vacation_balances"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    days_accrued = Column(Float, default=0.0)
+    days_used = Column(Float, default=0.0) # Usage, payouts and adjustments
+    balance = Column(Float, default=0.0)
+    accrued_through = Column(Date, nullable=True) # Last month end accrued
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
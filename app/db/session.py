@@ -1,6 +1,7 @@
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
 
 # MySQL requires specific connection arguments sometimes, but usually standard is fine with connector
@@ -12,3 +13,59 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async path (aiosqlite / aiomysql) for routers that must not block the event loop.
+# expire_on_commit=False: attributes stay readable after commit without hidden IO,
+# which AsyncSession can't do implicitly.
+async_engine = create_async_engine(settings.ASYNC_SQLALCHEMY_DATABASE_URI)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def apply_sqlite_pragmas(dbapi_connection):
+    """
+    Applies the SQLite production profile from Settings to a raw DB-API connection.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        # auto_vacuum must come first: it only sticks before the first table is created
+        cursor.execute(f"PRAGMA auto_vacuum = {settings.SQLITE_AUTO_VACUUM}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+        cursor.execute(f"PRAGMA foreign_keys = {'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}")
+    finally:
+        cursor.close()
+
+
+if settings.USE_SQLITE:
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_sqlite_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+def sqlite_maintenance(db: Session) -> int:
+    """
+    Periodic SQLite upkeep: refreshes planner statistics and returns free pages to the OS.
+    Registered as a scheduled job in app.main.
+
+    :return: Number of free pages reclaimed by incremental_vacuum
+    """
+    db.execute(text("PRAGMA optimize"))
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+    reclaimed = 0
+    # 2 = INCREMENTAL. Databases created before the profile stay at NONE until a full VACUUM.
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+        free_before = db.execute(text("PRAGMA freelist_count")).scalar()
+        pages = int(settings.SQLITE_INCREMENTAL_VACUUM_PAGES)
+        db.execute(text(f"PRAGMA incremental_vacuum({pages})" if pages else "PRAGMA incremental_vacuum"))
+        db.commit()
+        reclaimed = free_before - db.execute(text("PRAGMA freelist_count")).scalar()
+
+    return reclaimed
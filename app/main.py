@@ -2,18 +2,31 @@
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from datetime import timedelta
 from app.core.config import settings
+from app.core.scheduler import register_job, start_scheduler, stop_scheduler
+from app.core.job_pool import shutdown_pool
+from app.core.profiling import SQLProfilerMiddleware, instrument_engine
 from app.routers import auth
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import engine, async_engine, sqlite_maintenance
+from app.utils.calendar_changes import prune_calendar_changes
+from app.utils.payroll_jobs import resume_payroll_jobs
+from app.utils.vacations import accrue_vacations
+from app.db.migrations import run_migrations
 from app.db.models import user as user_model
 from app.db.models import project as project_model
-from app.routers import auth, deps, projects, logs, users, calendar, finance, dashboard, payroll, payments, liquidation
+from app.routers import auth, deps, projects, logs, users, calendar, finance, dashboard, payroll, payments, liquidation, vacations, admin
 from fastapi import FastAPI, Request, Depends
 from app.db.models.user import User
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
+if settings.PERF_PROFILING_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(SQLProfilerMiddleware)
+
 # Mount static files
 # Directory structure is app/static, so we mount it to /static path
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -35,9 +48,29 @@ app.include_router(finance.router)
 app.include_router(payroll.router)
 app.include_router(payments.router)
 app.include_router(liquidation.router)
+app.include_router(vacations.router)
+app.include_router(admin.router)
+
+# Background jobs
+register_job("overdue_invoices", finance.sweep_overdue_invoices, timedelta(hours=settings.OVERDUE_SWEEP_INTERVAL_HOURS))
+register_job("calendar_changes_prune", prune_calendar_changes, timedelta(hours=24), run_at_startup=False)
+register_job("vacation_accrual", accrue_vacations, timedelta(hours=settings.VACATION_ACCRUAL_INTERVAL_HOURS))
+if settings.USE_SQLITE:
+    # Not at startup: ANALYZE on a cold start would compete with the first requests
+    register_job("sqlite_maintenance", sqlite_maintenance, timedelta(hours=settings.SQLITE_MAINTENANCE_INTERVAL_HOURS), run_at_startup=False)
 
 # Create tables on startup (Simple approach)
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if settings.SCHEDULER_ENABLED:
+        start_scheduler()
+        # Payroll generations interrupted by a restart
+        resume_payroll_jobs()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_scheduler()
+    shutdown_pool()
 
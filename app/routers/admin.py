@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import RedirectResponse
+
+from app.routers import deps
+from app.db.models.user import User
+from app.core.config import settings
+from app.core.profiling import recent_profiles
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(deps.get_current_user)]
+)
+
+from app.core.templates import templates
+
+@router.get("/perf")
+async def perf_view(
+    request: Request,
+    flagged: bool = False,
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
+
+    profiles = list(recent_profiles)
+
+    # Per-route summary over the buffer, worst query count first
+    routes = {}
+    for p in profiles:
+        r = routes.setdefault((p.method, p.route), {
+            "method": p.method, "route": p.route, "requests": 0,
+            "statements": 0, "max_statements": 0, "db_ms": 0.0, "total_ms": 0.0, "flagged": 0
+        })
+        r["requests"] += 1
+        r["statements"] += p.statements
+        r["max_statements"] = max(r["max_statements"], p.statements)
+        r["db_ms"] += p.db_ms
+        r["total_ms"] += p.total_ms
+        r["flagged"] += 1 if p.n_plus_one else 0
+    route_summary = sorted(routes.values(), key=lambda r: r["max_statements"], reverse=True)
+
+    recent = [p for p in reversed(profiles) if not flagged or p.n_plus_one]
+
+    return templates.TemplateResponse("admin/perf.html", {
+        "request": request,
+        "user": user,
+        "route_summary": route_summary,
+        "recent": recent,
+        "flagged": flagged,
+        "enabled": settings.PERF_PROFILING_ENABLED,
+        "threshold": settings.PERF_N_PLUS_ONE_THRESHOLD,
+        "buffer_size": settings.PERF_RING_BUFFER_SIZE
+    })
@@ -4,7 +4,8 @@ from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.db.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, create_access_token
+from app.core.identity_cache import invalidate_user
 from app.core.config import settings
 from datetime import timedelta
 
@@ -21,12 +22,25 @@ async def login(
 ):
     # Authenticate
     db_user = db.query(User).filter(User.username == user).first()
-    if not db_user or not verify_password(pass_, db_user.hashed_password):
+    # Hand the connection back before the slow hash: during a login burst every
+    # request would otherwise sit on a pooled connection waiting for bcrypt
+    db.close()
+
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await verify_password_async(pass_, db_user.hashed_password)
+    if not valid:
         # Return to login with error (simplified for now, ideally show error message)
         # For HTMX or API, we return 401. For standard form, we might redirect back.
         # Let's redirect back with a query param for error ?error=1
         return RedirectResponse(url="/?error=invalid_credentials", status_code=status.HTTP_303_SEE_OTHER)
 
+    # Stored hash uses an old cost factor: upgrade it while we have the plain password
+    if new_hash:
+        db.query(User).filter(User.id == db_user.id).update({User.hashed_password: new_hash})
+        db.commit()
+        invalidate_user(db_user.username)
+
     # Create Token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -1,16 +1,26 @@
 
+from collections import Counter
 from typing import List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, Form, Request, status, HTTPException
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, literal
 
 from app.db.session import SessionLocal
-from app.db.models.schedule import ProjectSchedule, ScheduleTask
+from app.db.models.schedule import ProjectSchedule, ScheduleTask, SeriesTask, ScheduleTaskCompletion
 from app.db.models.project import Project
 from app.db.models.user import User
 from app.routers import deps
+from app.core.config import settings
+from app.utils.calendar_stamps import touch_calendar_days, range_stamp, range_etag
+from app.utils.recurrence import FREQUENCIES, expand_recurrence, parse_dates
+from app.utils.double_booking import find_double_bookings, same_day_schedules, double_booked_column, conflicts_message
+from app.utils.schedule_series import task_item, create_series, update_series, detach_from_series, delete_series_if_empty
+from app.utils.calendar_changes import record_calendar_change, record_schedule_changes, current_cursor, changed_schedule_ids
+from app.utils.payroll_entries import mark_payroll_dirty
 
 router = APIRouter(
     prefix="/calendar",
@@ -20,8 +30,11 @@ router = APIRouter(
 
 from app.core.templates import templates
 
+# Bump when the /events payload shape changes so cached ranges are not reused
+EVENTS_FORMAT = 3
+
 @router.get("/")
-async def calendar_view(request: Request, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
+async def calendar_view(request: Request, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
     # Supervisor sees admin view (can manage), Worker sees their own calendar
     # Client is redirected
     if user.role == "client":
@@ -31,119 +44,261 @@ async def calendar_view(request: Request, db: Session = Depends(deps.get_db), us
     workers = []
     # Admin and Supervisor get full list
     if user.role in ["admin", "supervisor"]:
-        projects = db.query(Project).filter(Project.is_active == True).all()
-        workers = db.query(User).filter(User.role.in_(["worker", "supervisor"])).all()
+        projects = (await db.execute(select(Project).filter(Project.is_active == True))).scalars().all()
+        workers = (await db.execute(select(User).filter(User.role.in_(["worker", "supervisor"])))).scalars().all()
 
     return templates.TemplateResponse("calendar/index.html", {
         "request": request, 
         "user": user,
         "projects": projects,
-        "workers": workers
+        "workers": workers,
+        "recurrence_options": FREQUENCIES
     })
 
-@router.get("/events")
-async def get_events(start: str, end: str, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
-    query = db.query(ProjectSchedule)
-    
+async def _load_events(db: AsyncSession, user: User, filters: list, whole_days: bool = True) -> list:
+    """
+    FullCalendar events for the schedules matching filters, as seen by user.
+    whole_days: filters select entire days (a date range), so a worker's other
+    bookings that day are loaded too and double booking can be counted here;
+    otherwise (delta sync by id) each row carries an EXISTS flag instead.
+    """
+    # Plain column projections instead of ORM objects: a month of every crew is
+    # thousands of rows, and building entities for them costs more than the query.
+    # Four queries regardless of range size: schedules (+names), their own tasks,
+    # the templates of their series and the per-day completions of those.
+    in_range = list(filters)
     # Admin and Supervisor see all
     if user.role not in ["admin", "supervisor"]:
-        query = query.filter(ProjectSchedule.user_id == user.id)
-    
-    schedules = query.filter(ProjectSchedule.date >= start, ProjectSchedule.date <= end).all()
-    
+        in_range.append(ProjectSchedule.user_id == user.id)
+
+    # Inner joins also drop schedules whose project or worker no longer exists
+    schedules = (await db.execute(
+        select(
+            # Order matters: unpacked positionally below
+            ProjectSchedule.id, ProjectSchedule.date, ProjectSchedule.project_id, ProjectSchedule.user_id,
+            ProjectSchedule.series_id, Project.name, User.username, User.full_name,
+            literal(False) if whole_days else double_booked_column()
+        )
+        .join(Project, Project.id == ProjectSchedule.project_id)
+        .join(User, User.id == ProjectSchedule.user_id)
+        .filter(*in_range)
+    )).all()
+
+    # Same filter instead of an IN list, which would hit SQLite's parameter limit on big ranges
+    tasks_by_schedule = {}
+    task_rows = (await db.execute(
+        select(ScheduleTask.schedule_id, ScheduleTask.id, ScheduleTask.title, ScheduleTask.description, ScheduleTask.completed)
+        .join(ProjectSchedule, ProjectSchedule.id == ScheduleTask.schedule_id)
+        .filter(*in_range)
+        .order_by(ScheduleTask.id)
+    )).all()
+    for schedule_id, task_id, title, description, completed in task_rows:
+        tasks_by_schedule.setdefault(schedule_id, []).append(task_item(task_id, title, description, completed))
+
+    # Series templates once per series, not once per day
+    template_by_series = {}
+    template_rows = (await db.execute(
+        select(SeriesTask.series_id, SeriesTask.id, SeriesTask.title, SeriesTask.description)
+        .filter(SeriesTask.series_id.in_(select(ProjectSchedule.series_id).filter(*in_range)))
+        .order_by(SeriesTask.series_id, SeriesTask.position)
+    )).all()
+    for series_id, task_id, title, description in template_rows:
+        template_by_series.setdefault(series_id, []).append((task_id, title, description))
+    done = set() # (schedule_id, series_task_id)
+    if template_by_series:
+        done = set((await db.execute(
+            select(ScheduleTaskCompletion.schedule_id, ScheduleTaskCompletion.series_task_id)
+            .join(ProjectSchedule, ProjectSchedule.id == ScheduleTaskCompletion.schedule_id)
+            .filter(*in_range)
+        )).all())
+
+    if whole_days:
+        bookings = Counter((row.user_id, row.date) for row in schedules)
+
+    is_manager = user.role in ["admin", "supervisor"]
+    color = "#000000" if is_manager else "#2563eb"
     events = []
-    for s in schedules:
-        if not s.user or not s.project:
-            continue
-            
-        is_manager = user.role in ["admin", "supervisor"]
-        evt = {
-            "id": s.id,
-            "title": f"{s.project.name} ({s.user.username})",
-            "start": s.date.isoformat(),
+    for schedule_id, day, project_id, user_id, series_id, project_name, username, full_name, double_booked in schedules:
+        if whole_days:
+            double_booked = bookings[(user_id, day)] > 1
+        tasks = tasks_by_schedule.get(schedule_id, [])
+        if series_id in template_by_series:
+            tasks = tasks + [
+                task_item(task_id, title, description, (schedule_id, task_id) in done, schedule_id)
+                for task_id, title, description in template_by_series[series_id]
+            ]
+        events.append({
+            "id": schedule_id,
+            "title": f"{project_name} ({username})",
+            "start": day.isoformat(),
             # Workers click to go to project, Managers click to Edit (handled in JS)
-            "url": f"/projects/{s.project.id}" if not is_manager else None, 
+            "url": f"/projects/{project_id}" if not is_manager else None,
             "extendedProps": {
-                "worker_id": s.user_id,
-                "project_id": s.project_id,
-                "project_name": s.project.name,
-                "worker_name": s.user.full_name or s.user.username,
-                "tasks": [{"id": t.id, "title": t.title, "description": t.description, "completed": t.completed} for t in s.tasks]
+                "worker_id": user_id,
+                "project_id": project_id,
+                "project_name": project_name,
+                "worker_name": full_name or username,
+                "series_id": series_id,
+                "double_booked": double_booked,
+                "tasks": tasks
             },
-            "color": "#000000" if is_manager else "#2563eb"
-        }
-        events.append(evt)
-        
-    return JSONResponse(events)
+            "color": "#dc2626" if double_booked else color
+        })
+
+    return events
+
+@router.get("/events")
+async def get_events(request: Request, start: str, end: str, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
+    # Conditional GET: the range version comes from calendar_day_stamps (one row per
+    # day, bumped by every write), so an unchanged range is answered with a 304
+    # without reading any schedule row.
+    stamp = await db.run_sync(range_stamp, start, end)
+    etag = range_etag(EVENTS_FORMAT, user.id, user.role, start, end, *stamp)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    events = await _load_events(db, user, [ProjectSchedule.date >= start, ProjectSchedule.date <= end])
+    return ORJSONResponse(events, headers=cache_headers)
+
+@router.get("/events/changes")
+async def get_event_changes(
+    since: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    """
+    Delta sync for an open calendar. Without since, only returns the current cursor
+    (take it before the first /events load). With since, returns the events changed
+    after it, restricted to start/end when given, and the ids to drop from the view
+    (deleted, reassigned away or moved out of the range). reset = reload everything.
+    """
+    cursor = await db.run_sync(current_cursor)
+    if since is None:
+        return ORJSONResponse({"cursor": cursor, "reset": False, "events": [], "removed": []})
+
+    worker_id = None if user.role in ["admin", "supervisor"] else user.id
+    schedule_ids = await db.run_sync(changed_schedule_ids, since, cursor, worker_id)
+    if schedule_ids is None:
+        return ORJSONResponse({"cursor": cursor, "reset": True, "events": [], "removed": []})
+
+    events = []
+    if schedule_ids:
+        filters = [ProjectSchedule.id.in_(schedule_ids)]
+        if start and end:
+            filters += [ProjectSchedule.date >= start, ProjectSchedule.date <= end]
+        events = await _load_events(db, user, filters, whole_days=False)
+    visible = {e["id"] for e in events}
+
+    return ORJSONResponse({
+        "cursor": cursor,
+        "reset": False,
+        "events": events,
+        "removed": [i for i in schedule_ids if i not in visible]
+    })
+
+def _parse_tasks(tasks_json: str) -> List[tuple]:
+    """(title, description) pairs from the modal's tasks_json, skipping empty ones."""
+    import json
+    try:
+        tasks_data = json.loads(tasks_json)
+    except json.JSONDecodeError:
+        return []
+    tasks = []
+    for task in tasks_data:
+        title = task.get("title", "").strip()
+        desc = task.get("description", "").strip()
+        if title or desc:
+            tasks.append((title, desc))
+    return tasks
 
 @router.post("/schedule")
 async def create_schedule(
     project_id: int = Form(...),
-    user_id: int = Form(...),
+    user_ids: List[int] = Form(..., alias="user_id"), # Repeat the field to assign several workers at once
     date_val: str = Form(..., alias="date"),
     end_date: Optional[str] = Form(None),
+    recurrence: str = Form("daily"),
+    weekdays: List[int] = Form([]),
+    interval: int = Form(1),
+    exclude_dates: str = Form(""),
     tasks_json: str = Form("[]"),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
         
     start_date = datetime.strptime(date_val, "%Y-%m-%d").date()
-    final_date = start_date
-    if end_date:
-        final_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        if final_date < start_date:
-             return JSONResponse({"status": "error", "message": "La fecha final no puede ser menor a la inicial"}, status_code=400)
-    
-    # Iterate from start to end
-    from datetime import timedelta
-    delta = final_date - start_date
-    
-    import json
-    tasks_data = []
+    final_date = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else start_date
     try:
-        tasks_data = json.loads(tasks_json)
-    except json.JSONDecodeError:
-        pass
+        days = expand_recurrence(start_date, final_date, recurrence, weekdays, interval, parse_dates(exclude_dates))
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    if not days:
+        return JSONResponse({"status": "error", "message": "La recurrencia no genera ningún día en ese rango"}, status_code=400)
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(days) * len(user_ids) > settings.CALENDAR_MAX_BULK_SCHEDULES:
+        return JSONResponse({"status": "error", "message": f"Máximo {settings.CALENDAR_MAX_BULK_SCHEDULES} asignaciones por operación"}, status_code=400)
 
-    for i in range(delta.days + 1):
-        current_day = start_date + timedelta(days=i)
-        
-        new_schedule = ProjectSchedule(
-            project_id=project_id,
-            user_id=user_id,
-            date=current_day
-        )
-        db.add(new_schedule)
-        db.flush()
-        
-        # Save tasks for this day
-        for task in tasks_data:
-            title = task.get("title", "")
-            desc = task.get("description", "")
-            if title.strip() or desc.strip():
-                db.add(ScheduleTask(
-                    schedule_id=new_schedule.id, 
-                    title=title.strip(),
-                    description=desc.strip()
-                ))
-
-    db.commit()
+    # Every requested worker-day against existing bookings, one query for the batch
+    conflicts = await db.run_sync(find_double_bookings, user_ids, days)
+    if conflicts and settings.CALENDAR_DOUBLE_BOOKING_POLICY == "reject":
+        return JSONResponse({"status": "error", "message": conflicts_message(conflicts), "conflicts": conflicts}, status_code=409)
+
+    # The tasks are stored once on a series shared by every day and worker
+    series_id = await db.run_sync(create_series, project_id, _parse_tasks(tasks_json))
+
+    # Bulk inserts: a handful of statements whatever the range, instead of one
+    # flush per day. Multi-row INSERT .. RETURNING where the dialect has it (SQLite);
+    # the ORM path (one INSERT per row) only on MySQL.
+    rows = [
+        {"project_id": project_id, "user_id": worker_id, "date": day, "series_id": series_id}
+        for worker_id in user_ids for day in days
+    ]
+    if db.bind.dialect.insert_returning:
+        created = (await db.execute(
+            insert(ProjectSchedule).returning(ProjectSchedule.id, ProjectSchedule.user_id), rows
+        )).all()
+    else:
+        schedules = [ProjectSchedule(**row) for row in rows]
+        db.add_all(schedules)
+        await db.flush()
+        created = [(s.id, s.user_id) for s in schedules]
+
+    await db.run_sync(touch_calendar_days, days)
+    await db.run_sync(record_schedule_changes, "create", created)
+    # The existing bookings are now double booked too
+    await db.run_sync(record_schedule_changes, "update", [(c["schedule_id"], c["user_id"]) for c in conflicts])
+    await db.commit()
     
-    return JSONResponse({"status": "success", "message": "Asignación creada correctamente"})
+    message = "Asignación creada correctamente"
+    if conflicts and settings.CALENDAR_DOUBLE_BOOKING_POLICY == "warn":
+        message = f"Asignación creada. {conflicts_message(conflicts)}"
+    return JSONResponse({"status": "success", "message": message, "conflicts": conflicts})
 
 @router.post("/schedule/{id}/delete")
-async def delete_schedule(id: int, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
+async def delete_schedule(id: int, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    schedule = db.query(ProjectSchedule).filter(ProjectSchedule.id == id).first()
+    schedule = (await db.execute(select(ProjectSchedule).filter(ProjectSchedule.id == id))).scalars().first()
     if not schedule:
         return JSONResponse({"status": "error", "message": "Asignación no encontrada"}, status_code=404)
         
-    db.delete(schedule)
-    db.commit()
+    siblings = await db.run_sync(same_day_schedules, schedule.user_id, schedule.date, schedule.id)
+    await db.delete(schedule)
+    await db.flush()
+    await db.run_sync(delete_series_if_empty, schedule.series_id)
+    await db.run_sync(touch_calendar_days, [schedule.date])
+    await db.run_sync(record_calendar_change, "schedule", "delete", schedule.id, schedule.user_id)
+    await db.run_sync(record_schedule_changes, "update", [(i, schedule.user_id) for i in siblings])
+    if schedule.is_confirmed:
+        await db.run_sync(mark_payroll_dirty, [(schedule.user_id, schedule.date)])
+    await db.commit()
     return JSONResponse({"status": "success", "message": "Asignación eliminada correctamente"})
 
 @router.post("/schedule/{id}/edit")
@@ -153,44 +308,74 @@ async def update_schedule(
     user_id: int = Form(...),
     date_val: str = Form(..., alias="date"),
     tasks_json: str = Form("[]"),
-    db: Session = Depends(deps.get_db),
+    scope: str = Form("day"), # "series": project and tasks apply to every day of the series
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    schedule = db.query(ProjectSchedule).filter(ProjectSchedule.id == id).first()
+    schedule = (await db.execute(select(ProjectSchedule).filter(ProjectSchedule.id == id))).scalars().first()
     if not schedule:
         return JSONResponse({"status": "error", "message": "Asignación no encontrada"}, status_code=404)
     
-    schedule.project_id = project_id
+    tasks = _parse_tasks(tasks_json)
+    new_date = datetime.strptime(date_val, "%Y-%m-%d").date()
+    conflicts = await db.run_sync(find_double_bookings, [user_id], [new_date], [schedule.id])
+    moved = (user_id, new_date) != (schedule.user_id, schedule.date)
+    # Only block edits that create the conflict, not ones to an already double-booked day
+    if conflicts and moved and settings.CALENDAR_DOUBLE_BOOKING_POLICY == "reject":
+        return JSONResponse({"status": "error", "message": conflicts_message(conflicts), "conflicts": conflicts}, status_code=409)
+
+    old_date, old_user_id = schedule.date, schedule.user_id
+    old_siblings = await db.run_sync(same_day_schedules, old_user_id, old_date, schedule.id)
+    # Date and worker always apply to this day only
     schedule.user_id = user_id
-    schedule.date = datetime.strptime(date_val, "%Y-%m-%d").date()
-    
-    # Update tasks (Replace all)
-    db.query(ScheduleTask).filter(ScheduleTask.schedule_id == id).delete()
-    
-    import json
-    try:
-        tasks_data = json.loads(tasks_json)
-        for task in tasks_data:
-            title = task.get("title", "")
-            desc = task.get("description", "")
-            if title.strip() or desc.strip():
-                db.add(ScheduleTask(
-                    schedule_id=schedule.id, 
-                    title=title.strip(),
-                    description=desc.strip()
-                ))
-    except json.JSONDecodeError:
-        pass
+    schedule.date = new_date
+
+    if schedule.series_id and scope == "series":
+        # A few statements for the whole series instead of rewriting every day
+        series_days = await db.run_sync(update_series, schedule.series_id, project_id, tasks)
+        touched = [(schedule_id, worker_id) for schedule_id, worker_id, _ in series_days]
+        days = [day for _, _, day in series_days]
+    else:
+        if schedule.series_id:
+            await db.run_sync(detach_from_series, schedule)
+        schedule.project_id = project_id
+        # Update tasks (Replace all)
+        await db.execute(delete(ScheduleTask).where(ScheduleTask.schedule_id == id))
+        if tasks:
+            await db.execute(insert(ScheduleTask), [
+                {"schedule_id": schedule.id, "title": title, "description": desc} for title, desc in tasks
+            ])
+        touched = [(schedule.id, user_id)]
+        days = [schedule.date]
 
-    db.commit()
-    return JSONResponse({"status": "success", "message": "Asignación actualizada correctamente"})
+    await db.run_sync(touch_calendar_days, days + [old_date])
+    # Journal under both workers so a reassignment also reaches the previous one's feed
+    if old_user_id != user_id:
+        touched.append((schedule.id, old_user_id))
+    # Same-day bookings at the old and new slot change their double-booking flag
+    touched += [(i, old_user_id) for i in old_siblings] + [(c["schedule_id"], user_id) for c in conflicts]
+    await db.run_sync(record_schedule_changes, "update", touched)
+
+    # Confirmed hours moved (or their project changed): draft payrolls go stale
+    payroll_cells = [(old_user_id, old_date), (user_id, schedule.date)] if schedule.is_confirmed else []
+    if schedule.series_id and scope == "series":
+        payroll_cells += [(worker_id, day) for _, worker_id, day in series_days]
+    await db.run_sync(mark_payroll_dirty, payroll_cells)
+
+    await db.commit()
+    message = "Asignación actualizada correctamente"
+    if conflicts and moved and settings.CALENDAR_DOUBLE_BOOKING_POLICY == "warn":
+        message = f"Asignación actualizada. {conflicts_message(conflicts)}"
+    return JSONResponse({"status": "success", "message": message, "conflicts": conflicts})
 
 @router.post("/task/{id}/toggle")
-async def toggle_task_status(id: int, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
-    task = db.query(ScheduleTask).filter(ScheduleTask.id == id).first()
+async def toggle_task_status(id: int, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
+    task = (await db.execute(
+        select(ScheduleTask).options(selectinload(ScheduleTask.schedule)).filter(ScheduleTask.id == id)
+    )).scalars().first()
     if not task:
         return JSONResponse({"status": "error", "message": "Tarea no encontrada"}, status_code=404)
     
@@ -199,10 +384,38 @@ async def toggle_task_status(id: int, db: Session = Depends(deps.get_db), user:
          raise HTTPException(status_code=403, detail="Not authorized")
 
     task.completed = not task.completed
-    db.commit()
+    await db.run_sync(touch_calendar_days, [task.schedule.date])
+    await db.run_sync(record_calendar_change, "task", "update", task.schedule_id, task.schedule.user_id, task.id)
+    await db.commit()
     
     return JSONResponse({
         "status": "success", 
         "message": "Estado actualizado", 
         "completed": task.completed
     })
+
+@router.post("/schedule/{schedule_id}/series-task/{task_id}/toggle")
+async def toggle_series_task_status(schedule_id: int, task_id: int, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
+    schedule = (await db.execute(select(ProjectSchedule).filter(ProjectSchedule.id == schedule_id))).scalars().first()
+    task = (await db.execute(select(SeriesTask).filter(SeriesTask.id == task_id))).scalars().first()
+    if not schedule or not task or task.series_id != schedule.series_id:
+        return JSONResponse({"status": "error", "message": "Tarea no encontrada"}, status_code=404)
+
+    # Check authorization: Admin, Supervisor, or the assigned worker
+    if user.role not in ["admin", "supervisor"] and schedule.user_id != user.id:
+         raise HTTPException(status_code=403, detail="Not authorized")
+
+    completion = await db.get(ScheduleTaskCompletion, (schedule_id, task_id))
+    if completion:
+        await db.delete(completion)
+    else:
+        db.add(ScheduleTaskCompletion(schedule_id=schedule_id, series_task_id=task_id))
+    await db.run_sync(touch_calendar_days, [schedule.date])
+    await db.run_sync(record_calendar_change, "task", "update", schedule_id, schedule.user_id, task_id)
+    await db.commit()
+
+    return JSONResponse({
+        "status": "success",
+        "message": "Estado actualizado",
+        "completed": completion is None
+    })
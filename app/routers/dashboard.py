@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, select
 
 from app.db.session import SessionLocal
 from app.routers import deps
@@ -9,9 +10,10 @@ from app.db.models.user import User
 from app.db.models.project import Project
 from app.db.models.finance import Invoice, InvoiceStatus
 from app.db.models.log import DailyLog
-from app.db.models.schedule import ProjectSchedule
+from app.db.models.schedule import ProjectSchedule, ScheduleSeries
 from app.db.models.associations import project_users
-from app.routers.finance import get_project_budget_status
+from app.utils.finance_summary import get_budget_summaries
+from app.utils.schedule_series import schedule_task_items
 
 router = APIRouter(
     prefix="/dashboard",
@@ -27,35 +29,27 @@ async def dashboard(
     start_date: str = None, 
     end_date: str = None, 
     invoice_status: str = None,
-    db: Session = Depends(deps.get_db), 
+    db: AsyncSession = Depends(deps.get_async_db), 
     user: User = Depends(deps.get_current_user)
 ):
     data = {}
     
     if user.role == "admin":
         # 1. Stats
-        active_projects = db.query(Project).filter(Project.is_active == True).all()
-        active_count = len(active_projects)
+        active_project_ids = (await db.execute(select(Project.id).filter(Project.is_active == True))).scalars().all()
+        active_count = len(active_project_ids)
         
-        total_adjudicated = 0.0
         # Calculate Total Adjudicated (Unfiltered typically)
-        for p in active_projects:
-            # Reusing finance logic for adjudication only
-            stats = get_project_budget_status(db, p)
-            total_adjudicated += stats["total_adjudicated"]
+        # Reusing finance logic for adjudication only
+        summaries = await db.run_sync(lambda s: get_budget_summaries(s, active_project_ids))
+        total_adjudicated = sum(stats["total_adjudicated"] for stats in summaries.values())
         
         # Calculate Total Invoiced (Filtered)
-        # Query all invoices for active projects
-        active_project_ids = [p.id for p in active_projects]
-        invoices_query = db.query(Invoice).join(ProjectSchedule, Invoice.budget_id == ProjectSchedule.id, isouter=True) 
-        # Wait, Invoice links to ProjectBudget via budget_id? 
-        # Let's check models. Project -> ProjectBudget -> Invoice?
         # Invoice.budget_id -> ProjectBudget.id. ProjectBudget.project_id -> Project.id
-        
-        # Simpler: query Invoice joined with ProjectBudget joined with Project
+        # so query Invoice joined with ProjectBudget joined with Project
         from app.db.models.finance import ProjectBudget
         
-        base_query = db.query(Invoice).join(ProjectBudget).join(Project).filter(Project.is_active == True)
+        base_query = select(Invoice).join(ProjectBudget).join(Project).filter(Project.is_active == True)
         
         # Apply Filters
         if start_date:
@@ -65,8 +59,10 @@ async def dashboard(
         if invoice_status and invoice_status != "all":
             base_query = base_query.filter(Invoice.status == invoice_status)
             
-        filtered_invoices = base_query.all()
-        total_invoiced = sum(inv.amount for inv in filtered_invoices)
+        filtered_invoices = base_query.subquery()
+        total_invoiced = (await db.execute(
+            select(func.coalesce(func.sum(filtered_invoices.c.amount), 0.0))
+        )).scalar()
 
         data["stats"] = {
             "active_projects": active_count,
@@ -84,19 +80,24 @@ async def dashboard(
              pending_statuses = [InvoiceStatus.PENDING, InvoiceStatus.PARTIAL, InvoiceStatus.OVERDUE]
              activity_query = activity_query.filter(Invoice.status.in_(pending_statuses))
         
-        # Order by due date
-        recent_invoices = activity_query.order_by(Invoice.due_date.asc()).all()
+        # Order by due date. The list shows each invoice's project.
+        recent_invoices = (await db.execute(
+            activity_query.options(selectinload(Invoice.budget).selectinload(ProjectBudget.project))
+            .order_by(Invoice.due_date.asc())
+        )).scalars().all()
         
         data["recent_activity"] = recent_invoices
         
     elif user.role == "client":
         # 1. Get Client Projects for Dropdown & Filter
-        client_projects = db.query(Project).join(project_users).filter(project_users.c.user_id == user.id).all()
+        client_projects = (await db.execute(
+            select(Project).join(project_users).filter(project_users.c.user_id == user.id)
+        )).scalars().all()
         project_ids = [p.id for p in client_projects]
         
         # 2. Logs Query
         # If project_id param is provided, verify it belongs to client
-        query = db.query(DailyLog).filter(DailyLog.project_id.in_(project_ids))
+        query = select(DailyLog).filter(DailyLog.project_id.in_(project_ids))
         
         selected_project_id = None
         if request.query_params.get("project_id"):
@@ -126,13 +127,17 @@ async def dashboard(
         # Pagination
         page = int(request.query_params.get("page", 1))
         limit = 10
-        total_records = query.count()
+        total_records = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
         
         from math import ceil
         total_pages = ceil(total_records / limit)
         offset = (page - 1) * limit
         
-        logs = query.offset(offset).limit(limit).all()
+        # The list shows author, project and photo count
+        logs = (await db.execute(
+            query.options(selectinload(DailyLog.user), selectinload(DailyLog.project), selectinload(DailyLog.photos))
+            .offset(offset).limit(limit)
+        )).scalars().all()
         
         data["logs"] = logs
         data["projects"] = client_projects
@@ -147,11 +152,20 @@ async def dashboard(
         # 1. Recent Activity: Assignments (Schedule)
         # Order by date desc (future first? or past? typically recent means latest)
         # User said "lista de Asignación definidas en el calendario"
-        assignments = db.query(ProjectSchedule).filter(
-            ProjectSchedule.user_id == user.id
-        ).order_by(ProjectSchedule.date.desc()).limit(20).all()
+        assignments = (await db.execute(
+            select(ProjectSchedule)
+            .options(
+                selectinload(ProjectSchedule.project),
+                selectinload(ProjectSchedule.tasks),
+                selectinload(ProjectSchedule.series).selectinload(ScheduleSeries.tasks),
+                selectinload(ProjectSchedule.completions)
+            )
+            .filter(ProjectSchedule.user_id == user.id)
+            .order_by(ProjectSchedule.date.desc()).limit(20)
+        )).scalars().all()
         
         data["recent_activity"] = assignments
+        data["assignment_tasks"] = {s.id: schedule_task_items(s) for s in assignments}
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request, 
@@ -164,7 +178,7 @@ async def activity_log(
     request: Request,
     page: int = 1,
     limit: int = 50,
-    db: Session = Depends(deps.get_db), 
+    db: AsyncSession = Depends(deps.get_async_db), 
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
@@ -174,9 +188,12 @@ async def activity_log(
     from app.db.models.activity import ActivityLog
 
     offset = (page - 1) * limit
-    total_records = db.query(ActivityLog).count()
+    total_records = (await db.execute(select(func.count(ActivityLog.id)))).scalar()
     
-    logs = db.query(ActivityLog).order_by(desc(ActivityLog.created_at)).offset(offset).limit(limit).all()
+    logs = (await db.execute(
+        select(ActivityLog).options(selectinload(ActivityLog.user))
+        .order_by(desc(ActivityLog.created_at)).offset(offset).limit(limit)
+    )).scalars().all()
     
     total_pages = ceil(total_records / limit)
 
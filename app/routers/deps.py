@@ -4,8 +4,9 @@ from fastapi import Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 from app.core.config import settings
+from app.core.identity_cache import identity_cache
 from app.db.models.user import User
 
 def get_db():
@@ -15,6 +16,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 async def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     token = request.cookies.get("access_token")
     
@@ -45,6 +50,12 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)) -> U
             headers={"Location": "/?error=invalid_token"}
         )
         
+    cached = identity_cache.get(username)
+    if cached is not None:
+        # Attach a copy to this request's session without hitting the DB
+        return db.merge(cached, load=False)
+
+    version = identity_cache.version(username)
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise HTTPException(
@@ -52,5 +63,6 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)) -> U
             detail="User not found",
             headers={"Location": "/?error=user_not_found"}
         )
-        
+
+    identity_cache.put(username, version, user)
     return user
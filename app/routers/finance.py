@@ -2,8 +2,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, HTTPException, status, Form
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 import datetime
 
 from app.db.session import SessionLocal
@@ -12,6 +13,7 @@ from app.db.models.finance import ProjectBudget, BudgetLine, Invoice, Payment, I
 from app.db.models.user import User
 from app.db.models.associations import project_users
 from app.routers import deps
+from app.utils.finance_summary import get_budget_summaries, apply_summary_delta
 
 router = APIRouter(
     prefix="/finance",
@@ -26,63 +28,40 @@ def check_finance_access(user: User):
         raise HTTPException(status_code=403, detail="Forbidden")
 
 def get_project_budget_status(db: Session, project: Project):
-    # Calculate totals
-    budget = db.query(ProjectBudget).filter(ProjectBudget.project_id == project.id).first()
-    
-    total_adjudicated = 0.0
-    total_invoiced = 0.0
-    
-    if budget:
-        # Sum lines (calculated properties not available in query easily, so loop or hybrid)
-        # Using python loop for simplicity as N is small
-        for line in budget.lines:
-             # Tax calculation: subtotal + subtotal * (tax/100)
-             total_adjudicated += line.subtotal * (1 + (line.tax_percentage / 100.0))
-        
-        # Add Prorogue
-        if budget.is_prorrogable and budget.active_prorogue:
-            total_adjudicated += budget.prorrogable_amount or 0.0
-            
-        # Sum Invoices
-        for inv in budget.invoices:
-            total_invoiced += inv.amount
-
-    return {
-        "budget": budget,
-        "total_adjudicated": total_adjudicated,
-        "total_invoiced": total_invoiced,
-        "balance": total_adjudicated - total_invoiced
-    }
+    return get_budget_summaries(db, [project.id])[project.id]
 
-def check_update_overdue_invoices(db: Session, project_id: int):
-    today = datetime.date.today()
-    # Find pending invoices past due
-    overdue = db.query(Invoice).join(ProjectBudget).filter(
-        ProjectBudget.project_id == project_id,
+def sweep_overdue_invoices(db: Session, today: Optional[datetime.date] = None) -> int:
+    """
+    Flips every pending invoice past its due date to overdue in one UPDATE.
+    Runs as a scheduled job (see app.main), not on the request path.
+    """
+    today = today or datetime.date.today()
+    count = db.query(Invoice).filter(
         Invoice.status == InvoiceStatus.PENDING,
         Invoice.due_date < today
-    ).all()
-    
-    if overdue:
-        for inv in overdue:
-            inv.status = InvoiceStatus.OVERDUE
-        db.commit()
+    ).update({Invoice.status: InvoiceStatus.OVERDUE}, synchronize_session=False)
+    db.commit()
+    return count
 
 @router.get("/")
-async def finance_dashboard(request: Request, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
+async def finance_dashboard(request: Request, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
     check_finance_access(user)
     
     # Get Projects
     if user.role == "admin":
-        projects = db.query(Project).all()
+        projects = (await db.execute(select(Project))).scalars().all()
     else:
         # Client
-        projects = db.query(Project).join(project_users).filter(project_users.c.user_id == user.id).all()
+        projects = (await db.execute(
+            select(Project).join(project_users).filter(project_users.c.user_id == user.id)
+        )).scalars().all()
     
     # Compile Data
+    project_ids = [p.id for p in projects]
+    summaries = await db.run_sync(lambda s: get_budget_summaries(s, project_ids))
     finance_projects = []
     for p in projects:
-        status = get_project_budget_status(db, p)
+        status = summaries[p.id]
         finance_projects.append({
             "project": p,
             "licitation": status["budget"].licitation_number if status["budget"] else "N/A",
@@ -108,25 +87,26 @@ async def finance_detail(
     end_date: Optional[str] = None,
     sort_by: str = "issue_date",
     order: str = "desc",
-    db: Session = Depends(deps.get_db), 
+    db: AsyncSession = Depends(deps.get_async_db), 
     user: User = Depends(deps.get_current_user)
 ):
     check_finance_access(user)
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = (await db.execute(
+        select(Project).options(selectinload(Project.users)).filter(Project.id == project_id)
+    )).scalars().first()
     if not project:
          raise HTTPException(status_code=404, detail="Project not found")
 
     if user.role == "client" and user.id not in [u.id for u in project.users]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Update Overdue Statuses
-    check_update_overdue_invoices(db, project.id)
-
-    status_data = get_project_budget_status(db, project)
+    status_data = await db.run_sync(lambda s: get_project_budget_status(s, project))
     budget = status_data["budget"]
     
-    lines = budget.lines if budget else []
+    lines = []
+    if budget:
+        lines = (await db.execute(select(BudgetLine).filter(BudgetLine.budget_id == budget.id))).scalars().all()
     
     # Paginated Invoices
     invoices = []
@@ -134,7 +114,9 @@ async def finance_detail(
     total_pages = 0
     
     if budget:
-        query = db.query(Invoice).filter(Invoice.budget_id == budget.id)
+        # Line and payment are shown per row
+        query = select(Invoice).options(selectinload(Invoice.line), selectinload(Invoice.payment))\
+            .filter(Invoice.budget_id == budget.id)
 
         # Filters
         if status and status != 'all':
@@ -149,7 +131,7 @@ async def finance_detail(
             query = query.filter(Invoice.issue_date <= e_date)
 
         # Count
-        total_records = query.count()
+        total_records = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
         
         # Sorting
         if sort_by == 'invoice_number':
@@ -170,7 +152,7 @@ async def finance_detail(
 
         # Fetch Page
         offset = (page - 1) * limit
-        invoices = query.offset(offset).limit(limit).all()
+        invoices = (await db.execute(query.offset(offset).limit(limit))).scalars().all()
             
         from math import ceil
         total_pages = ceil(total_records / limit)
@@ -202,18 +184,22 @@ async def create_invoice(
     due_date: str = Form(...),
     amount: float = Form(...),
     budget_line_id: int = Form(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = (await db.execute(
+        select(Project).options(selectinload(Project.budget)).filter(Project.id == project_id)
+    )).scalars().first()
     if not project or not project.budget:
         raise HTTPException(status_code=400, detail="Project or Budget not found")
 
     # Verify Line belongs to budget
-    line = db.query(BudgetLine).filter(BudgetLine.id == budget_line_id, BudgetLine.budget_id == project.budget.id).first()
+    line = (await db.execute(
+        select(BudgetLine).filter(BudgetLine.id == budget_line_id, BudgetLine.budget_id == project.budget.id)
+    )).scalars().first()
     if not line:
         raise HTTPException(status_code=400, detail="Invalid Budget Line")
         
@@ -227,7 +213,8 @@ async def create_invoice(
         status=InvoiceStatus.PENDING
     )
     db.add(invoice)
-    db.commit()
+    await db.run_sync(lambda s: apply_summary_delta(s, project.id, invoiced=amount))
+    await db.commit()
     
     response = RedirectResponse(url=f"/finance/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(key="toast_message", value="Factura creada exitosamente")
@@ -241,13 +228,16 @@ async def pay_invoice(
     amount: float = Form(...),
     payment_type: str = Form(...), # "full" or "partial"
     note: Optional[str] = Form(None),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
+    invoice = (await db.execute(
+        select(Invoice).options(selectinload(Invoice.payment), selectinload(Invoice.budget))
+        .filter(Invoice.id == invoice_id)
+    )).scalars().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
         
@@ -258,10 +248,12 @@ async def pay_invoice(
     # Proceeding with current 1-to-1 constraint.
     
     # Check if payment already exists (if it's partial maybe we are updating? logic unclear from prompt but simplified model assumes new)
+    previous_amount = 0.0
     if invoice.payment:
         # If exists, we might need to delete old or update. Let's error for safety or update.
         # Ideally we update the existing payment info.
         payment = invoice.payment
+        previous_amount = payment.amount or 0.0
         payment.payment_date = datetime.datetime.strptime(payment_date, "%Y-%m-%d").date()
         payment.deposit_number = deposit_number
         payment.amount = amount
@@ -286,7 +278,8 @@ async def pay_invoice(
     if note:
         invoice.note = note
     
-    db.commit()
+    await db.run_sync(lambda s: apply_summary_delta(s, invoice.budget.project_id, paid=amount - previous_amount))
+    await db.commit()
     
     response = RedirectResponse(url=f"/finance/{invoice.budget.project_id}", status_code=status.HTTP_303_SEE_OTHER)
     msg = "Pago registrado exitosamente" if payment_type == "full" else "Pago parcial registrado"
@@ -1,7 +1,7 @@
 
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Body, Request
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
+from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
@@ -10,8 +10,12 @@ from app.db.session import SessionLocal
 from app.routers import deps
 from app.db.models.user import User
 from app.db.models.liquidation import Liquidation
-from app.db.models.payment import PayrollPayment
 from app.utils.activity import log_activity
+from app.utils.json_stream import iter_json_list
+from app.utils.liquidation import last_payment_dates, liquidation_rows
+from app.utils.aguinaldo import aguinaldo_year, accrued_gross, accrued_through
+from app.utils.vacations import vacation_balances, vacation_entries, settle_vacations
+from app.core.identity_cache import invalidate_user
 from app.core.templates import templates
 
 router = APIRouter(
@@ -67,87 +71,64 @@ async def liquidation_history(
         "request": request,
         "user": user,
         "target_user": target_user,
-        "liquidations": liquidations
+        "liquidations": liquidations,
+        "vacation_balance": vacation_balances(db, [user_id]).get(user_id),
+        "vacation_entries": vacation_entries(db, user_id, limit=50)
     })
 
 
 
 def calculate_liquidation_data(target_user: User, ref_date: date, db: Session, custom_start_date: date = None):
-    # Determines start of unpaid period
-    # Use custom_start_date if provided, else user's start_date
-    effective_start_date = custom_start_date if custom_start_date else target_user.start_date
+    # Same computation as the batch preview, for one worker.
+    # custom_start_date overrides the user's start_date (start of unpaid period)
+    last_payments = last_payment_dates(db, [target_user.id])
+    accrued = accrued_gross(db, aguinaldo_year(ref_date), [target_user.id])
+    start_dates = {target_user.id: custom_start_date} if custom_start_date else None
+    return liquidation_rows(
+        [target_user], last_payments, ref_date, start_dates, accrued, accrued_through(db, ref_date),
+        vacation_balances(db, [target_user.id])
+    )[0]
 
-    # 1. Vacations
-    # Rule: 1 day per month worked.
-    vacation_days = 0
-    months_worked = 0
-    if effective_start_date:
-        # Calculate full months
-        delta = ref_date - effective_start_date
-        if delta.days > 0:
-            months_worked = delta.days / 30.44 # Approx
-            vacation_days = months_worked # 1 day per month
-    
-    # Calculate vacation amount
-    # (Monthly Salary / 30) * Vacation Days
-    vacation_amount = 0.0
-    if target_user.monthly_salary:
-        daily_salary = target_user.monthly_salary / 30
-        vacation_amount = daily_salary * vacation_days
+@router.get("/preview")
+async def preview_liquidations(
+    calculation_date: str = None,
+    db: Session = Depends(deps.get_db),
+    user: User = Depends(deps.get_current_user)
+):
+    """
+    Liquidation preview for every active worker (year-end provisioning): five
+    queries and one columnar pass whatever the crew size, streamed as
+    {"items": [...], "totals": {...}, "calculation_date": ...}.
+    """
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
 
-    # 2. Aguinaldo
-    # Rule: (Monthly Salary / 12) * Months Worked (Approx simplified)
-    # Ideally should sum actual gross salaries since Dec 1st.
-    # For now, keeping the estimation as per current logic.
-    aguinaldo_amount = (target_user.monthly_salary / 12) * months_worked if months_worked > 0 else 0.0
-    
-    # 3. Salary Due
-    # Unpaid hours since last payment or start date
-    # Defaults: 8 hours per day
-    salary_due = 0.0
-    
-    # Determines start of unpaid period
-    start_unpaid = effective_start_date
-    last_payment = db.query(PayrollPayment).filter(PayrollPayment.user_id == target_user.id).order_by(desc(PayrollPayment.date)).first()
-    days_pending = 0
-    
-    if last_payment:
-        # Assume paid up to and including payment date
-        start_unpaid = last_payment.date
-        # Count days AFTER last payment
-        if ref_date > start_unpaid:
-            days_pending = (ref_date - start_unpaid).days
-    else:
-        # Never paid, count from start date inclusive
-        if start_unpaid and ref_date >= start_unpaid:
-            days_pending = (ref_date - start_unpaid).days + 1
-            
-    if days_pending > 0:
-        daily_hours = 8
-        rate = 0.0
-        if target_user.hourly_rate:
-            rate = target_user.hourly_rate
-        elif target_user.monthly_salary:
-            rate = target_user.monthly_salary / 30 / 8
-            
-        salary_due = days_pending * daily_hours * rate
-    
-    total = vacation_amount + aguinaldo_amount + salary_due
-    
-    return {
-        "user_id": target_user.id,
-        "name": target_user.full_name,
-        "identity_card": None, # Field does not exist in User model yet
-        "start_date": effective_start_date, # Return the one used
-        "monthly_salary": target_user.monthly_salary, # Add this
-        "months_worked": round(months_worked, 2),
-        "vacation_days": round(vacation_days, 2),
-        "vacation_amount": round(vacation_amount, 2),
-        "aguinaldo_amount": round(aguinaldo_amount, 2),
-        "salary_due": round(salary_due, 2),
-        "total": round(total, 2),
-        "calculation_date": ref_date
+    ref_date = date.today()
+    if calculation_date:
+        try:
+            ref_date = date.fromisoformat(calculation_date)
+        except ValueError:
+            pass # Fallback to today
+
+    workers = db.query(User).filter(
+        User.role.in_(["worker", "supervisor"]),
+        User.status == "active"
+    ).order_by(User.full_name, User.id).all()
+    rows = liquidation_rows(
+        workers, last_payment_dates(db), ref_date,
+        accrued=accrued_gross(db, aguinaldo_year(ref_date)),
+        accrued_through=accrued_through(db, ref_date),
+        vacations=vacation_balances(db)
+    )
+
+    totals = {
+        key: round(sum(row[key] for row in rows), 2)
+        for key in ("vacation_amount", "aguinaldo_amount", "salary_due", "total")
     }
+    return StreamingResponse(
+        iter_json_list("items", rows, {"totals": totals, "calculation_date": ref_date, "count": len(rows)}),
+        media_type="application/json"
+    )
 
 @router.get("/preview/{target_user_id}")
 async def preview_liquidation(
@@ -251,6 +232,8 @@ async def create_liquidation(
         created_by_id=user.id
     )
     db.add(liq)
+    # Vacation days paid out leave the ledger at zero
+    settle_vacations(db, user_id, liq.date, vacation_days, created_by_id=user.id)
     
     # Mark user as liquidated?
     target_user = db.query(User).get(user_id)
@@ -259,6 +242,8 @@ async def create_liquidation(
         target_user.is_active = False
         
     db.commit()
+    if target_user:
+        invalidate_user(target_user.username)
     
     log_activity(db, user, "CREATE", "LIQUIDATION", liq.id, f"Liquidated user {user_id}")
 
@@ -288,6 +273,7 @@ async def reactivate_user(
     target_user.start_date = date.today() # Reset start date to today (Re-hire)
     
     db.commit()
+    invalidate_user(target_user.username)
     
     log_activity(db, user, "UPDATE", "USER", target_user.id, f"Reactivated user {target_user.full_name}")
     
@@ -9,8 +9,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Form, File, UploadFile, status, Request, HTTPException
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, select, delete
 
 from app.db.session import SessionLocal
 from app.db.models.log import DailyLog, Photo
@@ -20,7 +21,7 @@ from app.db.models.project_details import ProjectTask
 from app.db.models.user import User
 from app.db.models.associations import project_users
 from app.routers import deps
-from app.utils.activity import log_activity
+from app.utils.activity import log_activity_async
 
 router = APIRouter(
     prefix="/logs",
@@ -38,21 +39,21 @@ async def list_logs(
     limit: int = 10,
     sort: str = "date",
     order: str = "desc",
-    db: Session = Depends(deps.get_db), 
+    db: AsyncSession = Depends(deps.get_async_db), 
     user: User = Depends(deps.get_current_user)
 ):
     # RBAC: Admin sees all, others see only assigned projects
     if user.role == "admin":
-        count_query = db.query(func.count(DailyLog.id)).join(Project)
-        query = db.query(DailyLog).join(Project)
+        count_query = select(func.count(DailyLog.id)).join(Project)
+        query = select(DailyLog).join(Project)
     else:
         # Filter for Client/Worker
-        count_query = db.query(func.count(DailyLog.id))\
+        count_query = select(func.count(DailyLog.id))\
             .join(Project)\
             .join(project_users, Project.id == project_users.c.project_id)\
             .filter(project_users.c.user_id == user.id)
             
-        query = db.query(DailyLog)\
+        query = select(DailyLog)\
             .join(Project)\
             .join(project_users, Project.id == project_users.c.project_id)\
             .filter(project_users.c.user_id == user.id)
@@ -62,17 +63,17 @@ async def list_logs(
         # Check authorization for specific project if not admin
         if user.role != "admin":
             # Verify user belongs to this project
-            is_member = db.query(project_users).filter(
+            is_member = (await db.execute(select(project_users).filter(
                 project_users.c.user_id == user.id,
                 project_users.c.project_id == project_id
-            ).first()
+            ))).first()
             if not is_member:
                 raise HTTPException(status_code=403, detail="Not authorized for this project")
                 
         query = query.filter(DailyLog.project_id == project_id)
         count_query = count_query.filter(DailyLog.project_id == project_id)
 
-    total_records = count_query.scalar()
+    total_records = (await db.execute(count_query)).scalar()
 
     # Sorting
     if sort == "project":
@@ -88,10 +89,14 @@ async def list_logs(
 
     # Pagination
     offset = (page - 1) * limit
-    logs = query.offset(offset).limit(limit).all()
+    # The list shows author, project and photo count
+    logs = (await db.execute(
+        query.options(selectinload(DailyLog.user), selectinload(DailyLog.project), selectinload(DailyLog.photos))
+        .offset(offset).limit(limit)
+    )).scalars().all()
     
     # Get all projects for filter dropdown
-    projects = db.query(Project).all()
+    projects = (await db.execute(select(Project))).scalars().all()
     
     from math import ceil
     total_pages = ceil(total_records / limit)
@@ -110,8 +115,17 @@ async def list_logs(
     })
 
 @router.get("/{id}/detail")
-async def get_log_detail(id: int, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
-    log = db.query(DailyLog).filter(DailyLog.id == id).first()
+async def get_log_detail(id: int, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
+    log = (await db.execute(
+        select(DailyLog).options(
+            selectinload(DailyLog.project).selectinload(Project.users),
+            selectinload(DailyLog.project).selectinload(Project.tasks),
+            selectinload(DailyLog.project).selectinload(Project.contacts),
+            selectinload(DailyLog.user),
+            selectinload(DailyLog.photos),
+            selectinload(DailyLog.task_entries)
+        ).filter(DailyLog.id == id)
+    )).scalars().first()
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
     
@@ -158,8 +172,8 @@ async def get_log_detail(id: int, db: Session = Depends(deps.get_db), user: User
     }
 
 @router.post("/{id}/delete")
-async def delete_log(id: int, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
-    log = db.query(DailyLog).filter(DailyLog.id == id).first()
+async def delete_log(id: int, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
+    log = (await db.execute(select(DailyLog).filter(DailyLog.id == id))).scalars().first()
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
 
@@ -174,14 +188,14 @@ async def delete_log(id: int, db: Session = Depends(deps.get_db), user: User = D
     # We should add it to `task_entries` in Log model ideally, or manually delete.
     # Let's check Log model... 
     # I'll manually delete for safety or trust SQLite FK if ON DELETE CASCADE (unlikely set).
-    db.query(DailyLogTask).filter(DailyLogTask.log_id == id).delete()
+    await db.execute(delete(DailyLogTask).where(DailyLogTask.log_id == id))
     
-    db.delete(log)
-    db.commit()
+    await db.delete(log)
+    await db.commit()
     
     # Audit Log
     try:
-        log_activity(db, user, "DELETE", "REPORT", id, "Deleted report")
+        await log_activity_async(db, user, "DELETE", "REPORT", id, "Deleted report")
     except Exception as e:
         print(f"Audit Log Error: {e}")
         
@@ -194,10 +208,10 @@ async def update_log(
     id: int,
     notes: str = Form(...),
     task_ids: List[int] = Form([], alias="tasks"),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
-    log = db.query(DailyLog).filter(DailyLog.id == id).first()
+    log = (await db.execute(select(DailyLog).filter(DailyLog.id == id))).scalars().first()
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
 
@@ -209,17 +223,16 @@ async def update_log(
     # Update tasks
     # Clear existing tasks? Or merge?
     # Usually easier to clear and re-add for checklist behavior
-    db.query(DailyLogTask).filter(DailyLogTask.log_id == id).delete()
+    await db.execute(delete(DailyLogTask).where(DailyLogTask.log_id == id))
     
     for t_id in task_ids:
         db.add(DailyLogTask(log_id=log.id, task_id=t_id, completed=True))
 
-    db.commit()
-    db.commit()
+    await db.commit()
     
     # Audit Log
     try:
-        log_activity(db, user, "UPDATE", "REPORT", log.id, "Updated report details")
+        await log_activity_async(db, user, "UPDATE", "REPORT", log.id, "Updated report details")
     except Exception as e:
         print(f"Audit Log Error: {e}")
         
@@ -228,22 +241,26 @@ async def update_log(
     return response
 
 @router.get("/new")
-async def new_log_form(request: Request, project_id: Optional[int] = None, db: Session = Depends(deps.get_db), user: User = Depends(deps.get_current_user)):
+async def new_log_form(request: Request, project_id: Optional[int] = None, db: AsyncSession = Depends(deps.get_async_db), user: User = Depends(deps.get_current_user)):
     # RBAC: Clients cannot report
     if user.role == "client":
         return RedirectResponse(url="/projects", status_code=status.HTTP_303_SEE_OTHER)
 
     # Get available projects
+    # Tasks are sent to the form for every project
     if user.role == "admin":
-        projects = db.query(Project).filter(Project.is_active == True).all()
+        projects = (await db.execute(
+            select(Project).options(selectinload(Project.tasks)).filter(Project.is_active == True)
+        )).scalars().all()
     else:
         # Worker: only assigned active projects
         # Explicit query to avoid DetachedInstanceError with lazy loading
-        projects = db.query(Project)\
-            .join(project_users)\
-            .filter(project_users.c.user_id == user.id)\
-            .filter(Project.is_active == True)\
-            .all()
+        projects = (await db.execute(
+            select(Project).options(selectinload(Project.tasks))
+            .join(project_users)
+            .filter(project_users.c.user_id == user.id)
+            .filter(Project.is_active == True)
+        )).scalars().all()
 
     # Pre-fetch tasks for all available projects to pass to JS
     project_tasks_map = {}
@@ -273,7 +290,7 @@ async def create_log(
     notes: str = Form(""),
     task_ids: List[int] = Form([], alias="tasks"), # IDs of completed tasks
     photos: List[UploadFile] = File(default=None),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role == "client":
@@ -281,7 +298,9 @@ async def create_log(
     
     # Validation
     if user.role != "admin":
-        assigned = db.query(Project).filter(Project.id == project_id, Project.users.any(id=user.id)).first()
+        assigned = (await db.execute(
+            select(Project).filter(Project.id == project_id, Project.users.any(id=user.id))
+        )).scalars().first()
         if not assigned:
              response = RedirectResponse(url="/projects", status_code=status.HTTP_303_SEE_OTHER)
              response.set_cookie(key="toast_message", value="No tienes permiso para reportar en este proyecto")
@@ -297,7 +316,7 @@ async def create_log(
         notes=notes
     )
     db.add(new_log)
-    db.flush() # Get ID
+    await db.flush() # Get ID
 
     # Handle Tasks
     if task_ids:
@@ -330,12 +349,11 @@ async def create_log(
                 db_photo = Photo(log_id=new_log.id, file_path=relative_path)
                 db.add(db_photo)
 
-    db.commit()
-    db.commit()
+    await db.commit()
     
     # Audit Log
     try:
-        log_activity(db, user, "CREATE", "REPORT", new_log.id, f"Created report for {log_date}")
+        await log_activity_async(db, user, "CREATE", "REPORT", new_log.id, f"Created report for {log_date}")
     except Exception as e:
         print(f"Audit Log Error: {e}")
         
@@ -357,13 +375,21 @@ async def send_email(
     id: int, 
     email_data: EmailSchema,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    log = db.query(DailyLog).filter(DailyLog.id == id).first()
+    # Everything the email template reads is loaded now, the session is gone by the time it runs
+    log = (await db.execute(
+        select(DailyLog).options(
+            selectinload(DailyLog.project).selectinload(Project.tasks),
+            selectinload(DailyLog.user),
+            selectinload(DailyLog.photos),
+            selectinload(DailyLog.task_entries)
+        ).filter(DailyLog.id == id)
+    )).scalars().first()
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
 
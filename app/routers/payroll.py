@@ -1,18 +1,32 @@
 from typing import List, Optional
 from datetime import date, datetime
+import asyncio
+import base64
+
+import numpy as np
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Body, Request
-from fastapi.responses import JSONResponse, HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, update, insert
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 from app.routers import deps
+from app.core.config import settings
 from app.db.models.user import User
 from app.db.models.schedule import ProjectSchedule
-from app.db.models.payroll import PayrollPeriod, PayrollEntry
+from app.db.models.payroll import PayrollPeriod, PayrollEntry, PayrollDirtyCell, PayrollJob, AguinaldoAccrual
 import pydantic
 from app.db.models.project import Project
-from app.utils.activity import log_activity
+from app.db.models.vacation import VacationBalance
+from app.db.models.associations import project_users
+from app.utils.activity import log_activity_async
+from app.utils.payroll_rules import compute_payroll, compute_deductions
+from app.utils.payroll_entries import mark_payroll_dirty, stale_user_ids, recompute_period
+from app.utils.payroll_jobs import FINISHED, job_status, submit_payroll_job
+from app.utils.json_stream import iter_json_list
+from app.utils.aguinaldo import AGUINALDO_MONTHS, aguinaldo_year, aguinaldo_year_start, apply_period_accruals
 from app.core.templates import templates
 
 router = APIRouter(
@@ -21,10 +35,15 @@ router = APIRouter(
     dependencies=[Depends(deps.get_current_user)]
 )
 
+async def _vacation_days(db: AsyncSession, user_id: int) -> float:
+    # Ledger balance kept by app.utils.vacations (accrued through the last month end)
+    balance = await db.get(VacationBalance, user_id)
+    return round(balance.balance or 0.0, 2) if balance else 0.0
+
 @router.get("/", response_class=HTMLResponse)
 async def payroll_dashboard(
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor", "worker"]:
@@ -34,7 +53,7 @@ async def payroll_dashboard(
     # Supervisor: Approval view redirect? Or dashboard with limited options?
     # Worker: My payments/payroll?
     
-    query = db.query(PayrollPeriod).order_by(PayrollPeriod.start_date.desc())
+    query = select(PayrollPeriod).order_by(PayrollPeriod.start_date.desc())
     
     if user.role in ["worker", "supervisor"]:
         # Only periods where user has an entry, OR allows seeing active/draft if they are scheduled?
@@ -42,30 +61,27 @@ async def payroll_dashboard(
         # Filtering by existence of PayrollEntry for this user
         query = query.join(PayrollEntry).filter(PayrollEntry.user_id == user.id)
         
-    periods = query.all()
+    periods = (await db.execute(query)).scalars().all()
+    # Drafts with hours changed after generation
+    stale_period_ids = set((await db.execute(select(PayrollDirtyCell.payroll_period_id).distinct())).scalars().all())
 
     # Calculate stats for Worker/Supervisor
     worker_stats = {}
     if user.role in ["worker", "supervisor"]:
-        vacation_days = 0
-        if user.start_date:
-            delta = date.today() - user.start_date
-            if delta.days > 0:
-                months_worked = delta.days / 30.44
-                vacation_days = months_worked 
-        worker_stats["vacation_days"] = round(vacation_days, 2)
+        worker_stats["vacation_days"] = await _vacation_days(db, user.id)
     
     return templates.TemplateResponse("payroll/index.html", {
         "request": request,
         "user": user,
         "periods": periods,
+        "stale_period_ids": stale_period_ids,
         "worker_stats": worker_stats
     })
 
 @router.get("/approval", response_class=HTMLResponse)
 async def approval_view(
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
@@ -80,100 +96,105 @@ async def approval_view(
     })
 
 
+# Totals key -> entry row field
+TOTAL_FIELDS = {
+    "hours": "total_hours",
+    "overtime_hours": "overtime_hours",
+    "gross": "gross_salary",
+    "social_charges": "social_charges",
+    "net": "net_salary",
+    "cs_empresa": "cs_empresa",
+    "previsiones": "previsiones",
+    "company_cost": "company_cost",
+    "regular_amount": "regular_amount",
+    "overtime_amount": "overtime_amount"
+}
+
+SNAPSHOT_FIELDS = ("regular_amount", "overtime_amount", "cs_empresa", "previsiones", "company_cost")
+
+
+def _is_snapshot(period: PayrollPeriod) -> bool:
+    # Periods finalized before snapshots existed are still computed live
+    return period.status == "final" and period.totals is not None
+
+
+def _entry_rows(entries: List[PayrollEntry], period: PayrollPeriod) -> List[dict]:
+    """
+    Entries with their derived amounts. Final periods read the amounts stored at
+    finalization; drafts compute them for the whole batch in one pass (stored
+    gross, overtime split with the worker's current rate).
+    """
+    if _is_snapshot(period):
+        derived = [{field: getattr(entry, field) or 0.0 for field in SNAPSHOT_FIELDS} for entry in entries]
+    else:
+        amounts = compute_payroll(
+            [entry.total_hours for entry in entries],
+            [entry.overtime_hours for entry in entries],
+            [entry.user.hourly_rate for entry in entries],
+            [entry.apply_deductions for entry in entries],
+            on=period.start_date,
+            gross=[entry.gross_salary for entry in entries]
+        )
+        columns = [amounts[field].tolist() for field in SNAPSHOT_FIELDS]
+        derived = [dict(zip(SNAPSHOT_FIELDS, values)) for values in zip(*columns)]
+
+    return [
+        {
+            "id": entry.id,
+            "user": entry.user,
+            "total_hours": entry.total_hours,
+            "gross_salary": entry.gross_salary,
+            "social_charges": entry.social_charges,
+            "net_salary": entry.net_salary,
+            "details": entry.details,
+            "apply_deductions": entry.apply_deductions,
+            "overtime_hours": entry.overtime_hours or 0.0,
+            **extra
+        }
+        for entry, extra in zip(entries, derived)
+    ]
+
+
+def _sum_totals(rows: List[dict]) -> dict:
+    return {key: float(np.sum([row[field] or 0.0 for row in rows])) for key, field in TOTAL_FIELDS.items()}
+
+
+async def _load_entries(db: AsyncSession, period_id: int, user: User) -> List[PayrollEntry]:
+    query = select(PayrollEntry).options(selectinload(PayrollEntry.user)).filter(PayrollEntry.payroll_period_id == period_id)
+    # Worker/Supervisor sees only own
+    if user.role in ["worker", "supervisor"]:
+        query = query.filter(PayrollEntry.user_id == user.id)
+    return (await db.execute(query.order_by(PayrollEntry.id))).scalars().all()
+
+
 @router.get("/detail/{period_id}", response_class=HTMLResponse)
 async def payroll_detail(
     period_id: int,
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor", "worker"]:
          raise HTTPException(status_code=403, detail="Not authorized")
 
-    period = db.query(PayrollPeriod).filter(PayrollPeriod.id == period_id).first()
+    period = (await db.execute(select(PayrollPeriod).filter(PayrollPeriod.id == period_id))).scalars().first()
     if not period:
         raise HTTPException(status_code=404, detail="Payroll period not found")
-        
-    entries = db.query(PayrollEntry).filter(PayrollEntry.payroll_period_id == period_id).all()
-    
-    # Calculate extra columns and totals
-    totals = {
-        "hours": 0.0,
-        "gross": 0.0,
-        "social_charges": 0.0,
-        "net": 0.0,
-        "cs_empresa": 0.0,
-        "previsiones": 0.0,
-        "company_cost": 0.0,
-        "regular_amount": 0.0,
-        "overtime_amount": 0.0,
-        "overtime_hours": 0.0
-    }
-    
-    enhanced_entries = []
-    
-    for entry in entries:
-        # Filter for worker/supervisor (only see own)
-        if user.role in ["worker", "supervisor"] and entry.user_id != user.id:
-            continue
-            
-        gross = entry.gross_salary
-        net = entry.net_salary
-        social = entry.social_charges
-        
-        # Split Amounts (Recalculate approximate split, ensuring sum matches gross)
-        rate = entry.user.hourly_rate or 0.0
-        # Round overtime to hundreds to match generation logic
-        overtime_amt = 0.0
-        if entry.overtime_hours:
-            overtime_amt = round((entry.overtime_hours * rate * 1.5) / 100) * 100
-        
-        regular_amt = gross - overtime_amt
-        
-        # New Calculations
-        cs_empresa = gross * 0.2667
-        previsiones = gross * 0.18
-        
-        # Accumulate
-        totals["hours"] += entry.total_hours
-        totals["overtime_hours"] += (entry.overtime_hours or 0.0)
-        totals["gross"] += gross
-        totals["social_charges"] += social
-        totals["net"] += net
-        totals["cs_empresa"] += cs_empresa
-        totals["previsiones"] += previsiones
-        totals["regular_amount"] += regular_amt
-        totals["overtime_amount"] += overtime_amt
-        
-        entry_dict = {
-            "user": entry.user,
-            "total_hours": entry.total_hours,
-            "gross_salary": gross,
-            "social_charges": social,
-            "net_salary": net,
-            "details": entry.details,
-            "cs_empresa": cs_empresa,
-            "previsiones": previsiones,
-            "apply_deductions": entry.apply_deductions,
-            "regular_amount": regular_amt,
-            "overtime_amount": overtime_amt,
-            "overtime_hours": entry.overtime_hours or 0.0
-        }
-        enhanced_entries.append(entry_dict)
-        
-    totals["company_cost"] = totals["gross"] + totals["cs_empresa"] + totals["previsiones"]
 
-    # For Worker/Supervisor view: Calculate Vacation Days
+    enhanced_entries = _entry_rows(await _load_entries(db, period_id, user), period)
+    # Workers whose hours changed after generation (until recomputed)
+    stale_ids = set(await db.run_sync(stale_user_ids, period_id)) if period.status == "draft" else set()
+
+    # Admin sees the whole period: final periods use the snapshot as is
+    if user.role == "admin" and _is_snapshot(period):
+        totals = period.totals
+    else:
+        totals = _sum_totals(enhanced_entries)
+
+    # For Worker/Supervisor view: Vacation Days
     worker_stats = {}
     if user.role in ["worker", "supervisor"]:
-        # Logic from liquidation: 1 day per month worked
-        vacation_days = 0
-        if user.start_date:
-            delta = date.today() - user.start_date
-            if delta.days > 0:
-                months_worked = delta.days / 30.44
-                vacation_days = months_worked # 1 day per month
-        worker_stats["vacation_days"] = round(vacation_days, 2)
+        worker_stats["vacation_days"] = await _vacation_days(db, user.id)
 
     return templates.TemplateResponse("payroll/detail.html", {
         "request": request,
@@ -181,6 +202,7 @@ async def payroll_detail(
         "period": period,
         "entries": enhanced_entries,
         "totals": totals,
+        "stale_ids": stale_ids,
         "worker_stats": worker_stats
     })
 
@@ -188,44 +210,37 @@ async def payroll_detail(
 async def payroll_report(
     period_id: int,
     request: Request,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor", "worker"]:
          raise HTTPException(status_code=403, detail="Not authorized")
 
-    period = db.query(PayrollPeriod).filter(PayrollPeriod.id == period_id).first()
+    period = (await db.execute(select(PayrollPeriod).filter(PayrollPeriod.id == period_id))).scalars().first()
     if not period:
         raise HTTPException(status_code=404, detail="Payroll period not found")
-        
-    entries = db.query(PayrollEntry).filter(PayrollEntry.payroll_period_id == period_id).all()
-    
-    report_data = []
-    total_net = 0.0
 
-    for entry in entries:
-        # Filter logic: Admin sees all. Worker/Supervisor sees only own.
-        if user.role in ["worker", "supervisor"] and entry.user_id != user.id:
-            continue
-        
-        # Calculate overtime amount approx (or use what we stored if we stored it? We didn't stored overtime_pay separately)
-        # Using current rate might be slightly off if rate changed, but best effort.
-        rate = entry.user.hourly_rate or 0.0
-        overtime_hours = entry.overtime_hours or 0.0
-        overtime_amount = overtime_hours * rate * 1.5
-        
-        report_data.append({
-            "name": entry.user.full_name or entry.user.username,
-            "phone": entry.user.phone or "N/A",
-            "hours": entry.total_hours,
-            "overtime_hours": overtime_hours,
-            "overtime_amount": overtime_amount,
-            "net_pay": entry.net_salary,
-            "payment_method": entry.user.payment_method,
-            "account_number": entry.user.account_number
-        })
-        total_net += entry.net_salary
-        
+    # Same overtime amount as the detail view
+    rows = _entry_rows(await _load_entries(db, period_id, user), period)
+
+    report_data = [
+        {
+            "name": row["user"].full_name or row["user"].username,
+            "phone": row["user"].phone or "N/A",
+            "hours": row["total_hours"],
+            "overtime_hours": row["overtime_hours"],
+            "overtime_amount": row["overtime_amount"],
+            "net_pay": row["net_salary"],
+            "payment_method": row["user"].payment_method,
+            "account_number": row["user"].account_number
+        }
+        for row in rows
+    ]
+    if user.role == "admin" and _is_snapshot(period):
+        total_net = period.totals["net"]
+    else:
+        total_net = float(np.sum([row["net_salary"] or 0.0 for row in rows]))
+
     return templates.TemplateResponse("payroll/report.html", {
         "request": request,
         "period": period,
@@ -234,49 +249,107 @@ async def payroll_report(
         "today": date.today()
     })
 
+@router.get("/aguinaldo", response_class=HTMLResponse)
+async def aguinaldo_report(
+    request: Request,
+    year: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    year = year or aguinaldo_year(date.today())
+    # Accumulated from finalized periods, one row per worker
+    rows = (await db.execute(
+        select(AguinaldoAccrual, User)
+        .join(User, User.id == AguinaldoAccrual.user_id)
+        .filter(AguinaldoAccrual.year == year)
+        .order_by(User.full_name, User.id)
+    )).all()
+
+    report_data = [
+        {
+            "name": worker.full_name or worker.username,
+            "periods": accrual.periods,
+            "gross_total": accrual.gross_total or 0.0,
+            "aguinaldo": (accrual.gross_total or 0.0) / AGUINALDO_MONTHS
+        }
+        for accrual, worker in rows
+    ]
+
+    return templates.TemplateResponse("payroll/aguinaldo.html", {
+        "request": request,
+        "year": year,
+        "year_start": aguinaldo_year_start(year),
+        "year_end": date(year, 11, 30),
+        "entries": report_data,
+        "total_gross": sum(row["gross_total"] for row in report_data),
+        "total_aguinaldo": sum(row["aguinaldo"] for row in report_data),
+        "today": date.today()
+    })
+
 @router.post("/confirm")
 async def confirm_payroll(
     period_id: int = Body(..., embed=True),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    period = db.query(PayrollPeriod).get(period_id)
+    period = await db.get(PayrollPeriod, period_id)
     if not period:
         raise HTTPException(status_code=404, detail="Period not found")
-        
+    if period.status == "final":
+        return {"status": "success", "message": "Planilla finalizada"}
+
+    # Bring stale workers up to date, then freeze the derived amounts: final
+    # periods are read back without recomputing
+    await db.run_sync(recompute_period, period_id)
+    rows = _entry_rows(await _load_entries(db, period_id, user), period)
+    if rows:
+        await db.execute(update(PayrollEntry), [
+            {"id": row["id"], **{field: row[field] for field in SNAPSHOT_FIELDS}}
+            for row in rows
+        ])
+    period.totals = _sum_totals(rows)
     period.status = "final"
-    db.commit()
+    await db.run_sync(apply_period_accruals, period_id)
+    await db.commit()
 
-    log_activity(db, user, "Finalizar Planilla", "PAYROLL", period.id, f"Periodo ID: {period.id} finalizado")
+    await log_activity_async(db, user, "Finalizar Planilla", "PAYROLL", period.id, f"Periodo ID: {period.id} finalizado")
     
     return {"status": "success", "message": "Planilla finalizada"}
 
 @router.delete("/{period_id}")
 async def delete_payroll(
     period_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    period = db.query(PayrollPeriod).get(period_id)
+    period = await db.get(PayrollPeriod, period_id)
     if not period:
         raise HTTPException(status_code=404, detail="Payroll period not found")
-        
-    db.delete(period)
-    db.commit()
 
-    log_activity(db, user, "Eliminar Planilla", "PAYROLL", period_id, f"Periodo ID: {period_id} eliminado")
+    if period.status == "final":
+        await db.run_sync(apply_period_accruals, period_id, -1)
+    # Jobs keep their status but lose the link: SQLite may hand the id to the next period
+    # (and its ondelete="SET NULL" only runs with foreign keys enabled)
+    await db.execute(update(PayrollJob).where(PayrollJob.payroll_period_id == period_id).values(payroll_period_id=None))
+    await db.delete(period)
+    await db.commit()
+
+    await log_activity_async(db, user, "Eliminar Planilla", "PAYROLL", period_id, f"Periodo ID: {period_id} eliminado")
     
     return {"status": "success", "message": "Planilla eliminada"}
 
 @router.get("/supervisor/projects")
 async def get_supervisor_projects(
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
@@ -284,30 +357,47 @@ async def get_supervisor_projects(
         
     projects = []
     if user.role == "supervisor":
-        # Return assigned projects
-        # Assuming user.projects is a relationship if setup, OR we need to fetch from Project model
-        # The User model has 'projects' relation via project_users table
-        projects = user.projects
+        # Return assigned projects (project_users), same as user.projects
+        projects = (await db.execute(
+            select(Project).join(project_users).filter(project_users.c.user_id == user.id)
+        )).scalars().all()
     else:
         # Admin sees all active projects
-        projects = db.query(Project).filter(Project.is_active == True).all()
+        projects = (await db.execute(select(Project).filter(Project.is_active == True))).scalars().all()
         
     data = [{"id": p.id, "name": p.name} for p in projects]
     return JSONResponse(data)
 
+def _encode_cursor(day: date, user_id: int, schedule_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([day.isoformat(), user_id, schedule_id])).decode()
+
+
+def _decode_cursor(cursor: str):
+    day, user_id, schedule_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.strptime(day, "%Y-%m-%d").date(), int(user_id), int(schedule_id)
+
+
 @router.get("/schedules")
 async def get_schedules_for_approval(
     date: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     project_id: Optional[int] = None,
-    db: Session = Depends(deps.get_db),
+    unconfirmed: bool = False, # Only schedules still pending approval
+    cursor: Optional[str] = None, # next_cursor of the previous page
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
          raise HTTPException(status_code=403, detail="Not authorized")
     
-    query = db.query(ProjectSchedule)
+    # Projection: project and worker names come from the join, no ORM objects
+    query = select(
+        ProjectSchedule.id, ProjectSchedule.date, ProjectSchedule.user_id,
+        ProjectSchedule.hours_worked, ProjectSchedule.overtime_hours, ProjectSchedule.is_confirmed,
+        Project.name, User.full_name, User.username
+    ).outerjoin(Project, Project.id == ProjectSchedule.project_id).outerjoin(User, User.id == ProjectSchedule.user_id)
 
     # Date Logic: Support single date (legacy) or range
     if start_date and end_date:
@@ -325,10 +415,15 @@ async def get_schedules_for_approval(
 
     if project_id:
         query = query.filter(ProjectSchedule.project_id == project_id)
+    if unconfirmed:
+        # ix_project_schedules_unconfirmed_date (or the project one when filtering by project)
+        query = query.filter(ProjectSchedule.is_confirmed == False)
     
     # Supervisors see only their projects check
     if user.role == "supervisor":
-        supervisor_project_ids = [p.id for p in user.projects]
+        supervisor_project_ids = (await db.execute(
+            select(project_users.c.project_id).filter(project_users.c.user_id == user.id)
+        )).scalars().all()
         if project_id and project_id not in supervisor_project_ids:
              raise HTTPException(status_code=403, detail="Project not assigned to supervisor")
              
@@ -338,25 +433,47 @@ async def get_schedules_for_approval(
         # Prevent seeing own records (Self-approval not allowed)
         # These must be approved by Admin
         query = query.filter(ProjectSchedule.user_id != user.id)
-        
+
+    # Keyset pagination on (date desc, worker, id): every page is an index range,
+    # however deep the client has scrolled
+    if cursor:
+        try:
+            c_date, c_user, c_id = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return JSONResponse(status_code=400, content={"status": "error", "message": "Cursor inválido"})
+        query = query.filter(or_(
+            ProjectSchedule.date < c_date,
+            and_(ProjectSchedule.date == c_date, or_(
+                ProjectSchedule.user_id > c_user,
+                and_(ProjectSchedule.user_id == c_user, ProjectSchedule.id > c_id)
+            ))
+        ))
+    limit = min(max(limit or settings.PAYROLL_APPROVAL_PAGE_SIZE, 1), settings.PAYROLL_APPROVAL_MAX_PAGE_SIZE)
+
     # Order by date desc, then worker
-    query = query.order_by(ProjectSchedule.date.desc(), ProjectSchedule.user_id)
+    query = query.order_by(ProjectSchedule.date.desc(), ProjectSchedule.user_id, ProjectSchedule.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.date, last.user_id, last.id)
+
+    data = [
+        {
+            "id": schedule_id,
+            "project_name": project_name or "Unknown",
+            "worker_name": full_name or username or "Unknown",
+            "date": day.isoformat(),
+            "hours_worked": hours_worked,
+            "overtime_hours": overtime_hours,
+            "is_confirmed": is_confirmed
+        }
+        for schedule_id, day, _, hours_worked, overtime_hours, is_confirmed, project_name, full_name, username in rows
+    ]
 
-    schedules = query.all()
-    
-    data = []
-    for s in schedules:
-        data.append({
-            "id": s.id,
-            "project_name": s.project.name if s.project else "Unknown",
-            "worker_name": s.user.full_name or s.user.username if s.user else "Unknown",
-            "date": s.date.isoformat(),
-            "hours_worked": s.hours_worked,
-            "overtime_hours": s.overtime_hours,
-            "is_confirmed": s.is_confirmed
-        })
-        
-    return JSONResponse(data)
+    return StreamingResponse(iter_json_list("items", data, {"next_cursor": next_cursor}), media_type="application/json")
 
 # -----------------------------------------------------------------------------
 # 1. HOURS CONFIRMATION (Supervisor / Admin)
@@ -367,22 +484,26 @@ async def confirm_hours(
     schedule_id: int = Body(..., embed=True),
     hours: float = Body(..., embed=True),
     overtime: float = Body(0.0, embed=True),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    schedule = db.query(ProjectSchedule).filter(ProjectSchedule.id == schedule_id).first()
+    schedule = (await db.execute(
+        select(ProjectSchedule).options(selectinload(ProjectSchedule.project)).filter(ProjectSchedule.id == schedule_id)
+    )).scalars().first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
 
     schedule.hours_worked = hours
     schedule.overtime_hours = overtime
     schedule.is_confirmed = True
-    db.commit()
+    await db.flush()
+    await db.run_sync(mark_payroll_dirty, [(schedule.user_id, schedule.date)])
+    await db.commit()
 
-    log_activity(db, user, "Aprobar Horas", "SCHEDULE", schedule.id, f"Horas: {hours}, Extra: {overtime} para Proyecto: {schedule.project.name if schedule.project else 'Unknown'}")
+    await log_activity_async(db, user, "Aprobar Horas", "SCHEDULE", schedule.id, f"Horas: {hours}, Extra: {overtime} para Proyecto: {schedule.project.name if schedule.project else 'Unknown'}")
 
     return {"status": "success", "message": "Horas confirmadas"}
 
@@ -394,44 +515,59 @@ class ScheduleUpdateItem(pydantic.BaseModel):
 @router.post("/hours/confirm-batch-update")
 async def confirm_hours_batch_update(
     updates: List[ScheduleUpdateItem] = Body(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    count = 0
-    for item in updates:
-        schedule = db.query(ProjectSchedule).filter(ProjectSchedule.id == item.id).first()
-        if schedule:
-            if user.role == "supervisor":
-                 if schedule.project not in user.projects:
-                     continue 
-            
-            schedule.hours_worked = item.hours
-            schedule.overtime_hours = item.overtime
-            schedule.is_confirmed = True
-            count += 1
-            
-    db.commit()
-    
-    log_activity(db, user, "Aprobar Lote", "SCHEDULE", 0, f"Se confirmaron {count} registros")
+    # Last value wins when an id is sent twice
+    values = {item.id: item for item in updates}
+    if not values:
+        return {"status": "success", "message": "0 registros confirmados"}
+
+    # Existence and authorization for the whole set in one query: supervisors
+    # only get the schedules of their projects, the rest is skipped
+    query = select(ProjectSchedule.id, ProjectSchedule.user_id, ProjectSchedule.date).where(ProjectSchedule.id.in_(list(values)))
+    if user.role == "supervisor":
+        query = query.where(ProjectSchedule.project_id.in_(
+            select(project_users.c.project_id).where(project_users.c.user_id == user.id)
+        ))
+    allowed = (await db.execute(query)).all()
+
+    count = len(allowed)
+    if allowed:
+        # One executemany UPDATE by primary key
+        await db.execute(update(ProjectSchedule), [
+            {"id": schedule_id, "hours_worked": values[schedule_id].hours, "overtime_hours": values[schedule_id].overtime, "is_confirmed": True}
+            for schedule_id, _, _ in allowed
+        ])
+        await db.run_sync(mark_payroll_dirty, [(user_id, day) for _, user_id, day in allowed])
+    await db.commit()
+
+    ids = ", ".join(str(schedule_id) for schedule_id, _, _ in sorted(allowed))
+    await log_activity_async(db, user, "Aprobar Lote", "SCHEDULE", 0, f"Se confirmaron {count} registros (IDs: {ids})")
 
     return {"status": "success", "message": f"{count} registros confirmados"}
 
 @router.post("/hours/confirm-batch")
 async def confirm_hours_batch(
     schedule_ids: List[int] = Body(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.query(ProjectSchedule).filter(ProjectSchedule.id.in_(schedule_ids)).update(
-        {"is_confirmed": True}, synchronize_session=False
+    await db.execute(
+        update(ProjectSchedule).where(ProjectSchedule.id.in_(schedule_ids))
+        .values(is_confirmed=True).execution_options(synchronize_session=False)
     )
-    db.commit()
+    cells = (await db.execute(
+        select(ProjectSchedule.user_id, ProjectSchedule.date).where(ProjectSchedule.id.in_(schedule_ids))
+    )).all()
+    await db.run_sync(mark_payroll_dirty, cells)
+    await db.commit()
     return {"status": "success", "message": "Lote confirmado"}
 
 # -----------------------------------------------------------------------------
@@ -442,7 +578,8 @@ async def confirm_hours_batch(
 async def generate_payroll(
     start_date: str = Body(...),
     end_date: str = Body(...),
-    db: Session = Depends(deps.get_db),
+    wait: bool = Body(False), # Block until the period exists (scripts, old clients)
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
@@ -451,109 +588,119 @@ async def generate_payroll(
     s_date = datetime.strptime(start_date, "%Y-%m-%d").date()
     e_date = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-    # Create Draft Period
-    period = PayrollPeriod(
-        start_date=s_date,
-        end_date=e_date,
-        status="draft"
-    )
-    db.add(period)
-    db.flush()
-
-    # Calculate for each worker
-    # Get all confirmed schedules in range
-    schedules = db.query(ProjectSchedule).filter(
-        ProjectSchedule.date >= s_date,
-        ProjectSchedule.date <= e_date,
-        ProjectSchedule.is_confirmed == True
-    ).all()
-
-    # Group by User
-    user_hours = {}
-    for s in schedules:
-        if s.user_id not in user_hours:
-            user_hours[s.user_id] = {"total_hours": 0.0, "overtime_hours": 0.0, "details": []}
-        
-        user_hours[s.user_id]["total_hours"] += s.hours_worked
-        user_hours[s.user_id]["overtime_hours"] += (getattr(s, "overtime_hours", 0.0) or 0.0)
-        user_hours[s.user_id]["details"].append({
-            "date": s.date.isoformat(),
-            "hours": s.hours_worked,
-            "overtime": s.overtime_hours,
-            "project": s.project.name if s.project else "Unknown"
-        })
-
-    # Create Entries
-    entries = []
-    for uid, data in user_hours.items():
-        worker = db.query(User).get(uid)
-        if not worker:
-            continue
-        
-        rate = worker.hourly_rate or 0.0
-        # Calculate separately
-        regular_pay = data["total_hours"] * rate
-        overtime_pay = data["overtime_hours"] * rate * 1.5
-        
-        # Round Gross to hundreds
-        gross = round((regular_pay + overtime_pay) / 100) * 100
-        
-        # Social Charges (9.17% - user specified "Aplicar cargas sociales")
-        charges = 0.0
-        if worker.apply_deductions:
-             charges = round((gross * 0.0917) / 100) * 100
-        
-        net = gross - charges
-
-        entry = PayrollEntry(
-            payroll_period_id=period.id,
-            user_id=uid,
-            total_hours=data["total_hours"],
-            overtime_hours=data["overtime_hours"],
-            gross_salary=gross,
-            social_charges=charges,
-            net_salary=net,
-            apply_deductions=worker.apply_deductions,
-            details=data["details"] # JSON
-        )
-        db.add(entry)
-        entries.append(entry)
+    # Queued as a job: the draft period is built in the worker pool
+    job = PayrollJob(kind="generate", status="queued", start_date=s_date, end_date=e_date, created_by=user.id)
+    db.add(job)
+    await db.commit()
+    future = submit_payroll_job(job.id)
+
+    if wait:
+        await asyncio.wrap_future(future)
+        await db.refresh(job)
+        if job.status != "done":
+            return JSONResponse(status_code=500, content={"status": "error", "message": "Error al generar la planilla", "job": job_status(job)})
+        return {"status": "success", "message": "Planilla generada (Borrador)", "period_id": job.payroll_period_id, "job_id": job.id}
+
+    return JSONResponse(status_code=202, content={
+        "status": "success",
+        "message": "Generación de planilla en cola",
+        "job_id": job.id,
+        "status_url": f"/payroll/jobs/{job.id}"
+    })
 
-    db.commit()
+@router.get("/jobs/{job_id}")
+async def get_payroll_job(
+    job_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
 
-    log_activity(db, user, "Generar Planilla", "PAYROLL", period.id, f"Periodo: {start_date} - {end_date}")
-    
-    return {"status": "success", "message": "Planilla generada (Borrador)", "period_id": period.id}
+    job = await db.get(PayrollJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@router.get("/jobs/{job_id}/events")
+async def payroll_job_events(
+    job_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    """Server-sent events: one message per status change, closed once the job finishes."""
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not await db.get(PayrollJob, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        while True:
+            # Short-lived session per poll: the request's session is closed by now
+            async with AsyncSessionLocal() as poll_db:
+                status = job_status(await poll_db.get(PayrollJob, job_id))
+            if status != last:
+                yield b"data: " + orjson.dumps(status) + b"\n\n"
+                last = status
+            if status["status"] in FINISHED:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post("/{period_id}/recompute")
+async def recompute_payroll(
+    period_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    period = await db.get(PayrollPeriod, period_id)
+    if not period:
+        raise HTTPException(status_code=404, detail="Payroll period not found")
+    if period.status == "final":
+        return JSONResponse(status_code=400, content={"status": "error", "message": "La planilla ya está finalizada"})
+
+    # Only the workers whose hours changed since generation
+    count = await db.run_sync(recompute_period, period_id)
+    await db.commit()
+
+    if count:
+        await log_activity_async(db, user, "Recalcular Planilla", "PAYROLL", period_id, f"Se recalcularon {count} trabajadores")
+
+    return {"status": "success", "message": f"{count} trabajadores recalculados", "recomputed": count}
 
 @router.patch("/entry/{entry_id}")
 async def update_payroll_entry_deductions(
     entry_id: int,
     apply_deductions: bool = Body(..., embed=True),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user: User = Depends(deps.get_current_user)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    entry = db.query(PayrollEntry).get(entry_id)
+    entry = await db.get(PayrollEntry, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
 
-    log_activity(db, user, "Actualizar Deducciones", "PAYROLL_ENTRY", entry_id, f"Planilla cambio deducciones a: {apply_deductions}")
+    period = await db.get(PayrollPeriod, entry.payroll_period_id)
+    if period.status == "final":
+        return JSONResponse(status_code=400, content={"status": "error", "message": "La planilla ya está finalizada"})
+
+    await log_activity_async(db, user, "Actualizar Deducciones", "PAYROLL_ENTRY", entry_id, f"Planilla cambio deducciones a: {apply_deductions}")
 
     entry.apply_deductions = apply_deductions
     
-    # Recalculate with rounding
-    # Note: gross_salary is already rounded from creation, but if we want to be safe we use it as is.
-    gross = entry.gross_salary 
-    charges = 0.0
-    if apply_deductions:
-        charges = round((gross * 0.0917) / 100) * 100
-        
-    entry.social_charges = charges
-    entry.net_salary = gross - charges
+    # Recalculate charges from the stored (already rounded) gross
+    amounts = compute_deductions([entry.gross_salary], [apply_deductions], on=period.start_date)
+    entry.social_charges = amounts["social_charges"].item()
+    entry.net_salary = amounts["net"].item()
     
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success", 
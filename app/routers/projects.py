@@ -18,7 +18,10 @@ from app.db.models.associations import project_users
 from sqlalchemy import desc, func
 from math import ceil
 from app.routers import deps
+from app.utils.calendar_stamps import touch_all_calendar_days
+from app.utils.calendar_changes import record_calendar_reset
 from app.utils.activity import log_activity
+from app.utils.finance_summary import refresh_project_summary
 
 router = APIRouter(
     prefix="/projects",
@@ -214,6 +217,8 @@ async def create_project(
             tax_percentage=line.tax_percentage
         ))
 
+    # Keep the denormalized finance totals in the same transaction
+    refresh_project_summary(db, project.id)
     db.commit()
     
     # Audit Log
@@ -262,6 +267,9 @@ async def update_project(
          raise HTTPException(status_code=404, detail="Project not found")
 
     # Update Fields
+    if project.name != project_in.name:
+        touch_all_calendar_days(db) # Project names are part of every calendar event
+        record_calendar_reset(db)
     project.name = project_in.name
     project.client_display_name = project_in.client_display_name
     project.province = project_in.province
@@ -333,6 +341,8 @@ async def update_project(
             tax_percentage=line.tax_percentage
         ))
 
+    # Keep the denormalized finance totals in the same transaction
+    refresh_project_summary(db, project.id)
     db.commit()
     
     # Audit Log
@@ -9,7 +9,10 @@ from sqlalchemy import func
 from app.db.session import SessionLocal
 from app.db.models.user import User
 from app.routers import deps
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core.identity_cache import invalidate_user
+from app.utils.calendar_stamps import touch_all_calendar_days
+from app.utils.calendar_changes import record_calendar_reset
 from sqlalchemy.exc import IntegrityError
 from app.utils.activity import log_activity
 
@@ -99,7 +102,7 @@ async def create_user(
 
     new_user = User(
         username=username,
-        hashed_password=get_password_hash(password),
+        hashed_password=await get_password_hash_async(password),
         full_name=full_name,
         role=role,
         phone=phone,
@@ -169,6 +172,10 @@ async def update_user(
             except ValueError:
                 pass
             
+        previous_username = edit_user.username
+        if (edit_user.username, edit_user.full_name) != (username, full_name):
+            touch_all_calendar_days(db) # Worker names are part of calendar events
+            record_calendar_reset(db)
         edit_user.username = username
         edit_user.full_name = full_name
         edit_user.role = role
@@ -185,10 +192,12 @@ async def update_user(
         edit_user.account_number = account_number if payment_method in ["Transferencia", "Sinpe"] else None
         
         if password and password.strip():
-             edit_user.hashed_password = get_password_hash(password)
+             edit_user.hashed_password = await get_password_hash_async(password)
              
         try:
             db.commit()
+            # Role / status / password changes apply on the user's next request
+            invalidate_user(previous_username, username)
             # Audit Log
             log_activity(db, user, "UPDATE", "USER", edit_user.id, f"Updated user {username}")
         except IntegrityError:
@@ -230,7 +239,10 @@ async def delete_user(
          
     deleted_username = user_to_delete.username    
     db.delete(user_to_delete)
+    touch_all_calendar_days(db) # Their schedules drop out of the calendar
+    record_calendar_reset(db)
     db.commit()
+    invalidate_user(deleted_username)
     
     # Audit Log
     log_activity(db, user, "DELETE", "USER", id, f"Deleted user {deleted_username}")
@@ -0,0 +1,118 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.routers import deps
+from app.db.models.user import User
+from app.db.models.vacation import VacationEntry
+from app.utils.activity import log_activity_async
+from app.utils.vacations import (
+    accrue_vacations, delete_vacation_entry, record_vacation_usage, vacation_balances, vacation_entries
+)
+
+router = APIRouter(
+    prefix="/vacations",
+    tags=["vacations"],
+    dependencies=[Depends(deps.get_current_user)]
+)
+
+
+def _balance_data(balance) -> dict:
+    return {
+        "balance": round(balance.balance or 0.0, 2) if balance else 0.0,
+        "days_accrued": round(balance.days_accrued or 0.0, 2) if balance else 0.0,
+        "days_used": round(balance.days_used or 0.0, 2) if balance else 0.0,
+        "accrued_through": balance.accrued_through if balance else None
+    }
+
+
+@router.get("/{user_id}")
+async def get_vacations(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin" and user.id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    balance = (await db.run_sync(vacation_balances, [user_id])).get(user_id)
+    entries = await db.run_sync(vacation_entries, user_id)
+    return {
+        "user_id": user_id,
+        **_balance_data(balance),
+        "entries": [
+            {"id": e.id, "kind": e.kind, "date": e.date, "days": round(e.days, 2), "notes": e.notes}
+            for e in entries
+        ]
+    }
+
+
+@router.post("/{user_id}/usage")
+async def register_vacation_usage(
+    user_id: int,
+    date_val: str = Body(..., alias="date"),
+    days: float = Body(...),
+    notes: str = Body(None),
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    target_user = await db.get(User, user_id)
+    if not target_user:
+        return JSONResponse({"status": "error", "message": "Usuario no encontrado"}, status_code=404)
+    if days <= 0:
+        return JSONResponse({"status": "error", "message": "Los días deben ser mayores a cero"}, status_code=400)
+    try:
+        day = date.fromisoformat(date_val)
+    except ValueError:
+        return JSONResponse({"status": "error", "message": "Fecha inválida"}, status_code=400)
+
+    entry = await db.run_sync(record_vacation_usage, user_id, day, days, "usage", notes, user.id)
+    await db.commit()
+    entry_id = entry.id
+    balance = (await db.run_sync(vacation_balances, [user_id])).get(user_id)
+
+    await log_activity_async(db, user, "Registrar Vacaciones", "VACATION", entry_id, f"{days} día(s) para usuario {user_id} desde {day.isoformat()}")
+
+    return {"status": "success", "message": "Vacaciones registradas", "id": entry_id, **_balance_data(balance)}
+
+
+@router.delete("/entry/{entry_id}")
+async def delete_vacation_usage(
+    entry_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    entry = await db.get(VacationEntry, entry_id)
+    if not entry:
+        return JSONResponse({"status": "error", "message": "Registro no encontrado"}, status_code=404)
+    if entry.kind != "usage":
+        return JSONResponse({"status": "error", "message": "Solo se pueden eliminar vacaciones tomadas"}, status_code=400)
+
+    user_id = entry.user_id
+    await db.run_sync(lambda s: delete_vacation_entry(s, s.get(VacationEntry, entry_id)))
+    await db.commit()
+
+    await log_activity_async(db, user, "Eliminar Vacaciones", "VACATION", entry_id, f"Registro {entry_id} del usuario {user_id}")
+
+    return {"status": "success", "message": "Registro eliminado"}
+
+
+@router.post("/accrue")
+async def run_vacation_accrual(
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user)
+):
+    """Runs the monthly accrual job now (it also runs on the scheduler)."""
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    count = await db.run_sync(accrue_vacations)
+    return {"status": "success", "message": f"{count} acumulaciones registradas", "entries": count}
@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.activity import ActivityLog
 from app.db.models.user import User
 
@@ -36,3 +37,27 @@ def log_activity(
         print(f"Error logging activity: {e}")
         # Validate that we don't break the main flow if logging fails
         db.rollback()
+
+async def log_activity_async(
+    db: AsyncSession,
+    user: User,
+    action: str,
+    entity_type: str,
+    entity_id: int = None,
+    details: str = None
+):
+    """
+    Same as log_activity, for routers running on an AsyncSession.
+    """
+    try:
+        db.add(ActivityLog(
+            user_id=user.id,
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            details=details,
+        ))
+        await db.commit()
+    except Exception as e:
+        print(f"Error logging activity: {e}")
+        await db.rollback()
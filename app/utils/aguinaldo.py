@@ -0,0 +1,154 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.db.models.payroll import PayrollPeriod, PayrollEntry, AguinaldoAccrual
+
+
+# Aguinaldo is 1/12 of the gross salary earned from Dec 1 to Nov 30, paid in
+# December. aguinaldo_accruals keeps that gross per worker and year, moved by
+# finalizing (+) or deleting (-) a final period, so readers never scan
+# payroll_entries. A period counts towards the year its end_date falls in.
+
+AGUINALDO_MONTHS = 12
+
+# Tolerance used when comparing stored totals against a fresh recomputation
+DRIFT_TOLERANCE = 0.01
+
+
+def aguinaldo_year(day: date) -> int:
+    """Year whose December aguinaldo includes day."""
+    return day.year + 1 if day.month == 12 else day.year
+
+
+def aguinaldo_year_start(year: int) -> date:
+    return date(year - 1, 12, 1)
+
+
+def apply_period_accruals(db: Session, period_id: int, sign: int = 1):
+    """
+    Adds the period's gross salaries to its aguinaldo year (sign=1, when the
+    period is finalized) or takes them back out (sign=-1, before a final period
+    is deleted). Relative UPDATEs for existing rows, one INSERT for the rest.
+    The caller is responsible for committing.
+    """
+    period = db.get(PayrollPeriod, period_id)
+    if period is None:
+        return
+    year = aguinaldo_year(period.end_date)
+
+    gross = {
+        user_id: float(total or 0.0)
+        for user_id, total in db.query(PayrollEntry.user_id, func.sum(PayrollEntry.gross_salary))
+        .filter(PayrollEntry.payroll_period_id == period_id)
+        .group_by(PayrollEntry.user_id)
+    }
+    if not gross:
+        return
+
+    table = AguinaldoAccrual.__table__
+    existing = {
+        user_id for user_id, in db.query(AguinaldoAccrual.user_id).filter(
+            AguinaldoAccrual.year == year, AguinaldoAccrual.user_id.in_(list(gross))
+        )
+    }
+    if existing:
+        db.execute(
+            update(table)
+            .where(table.c.user_id == bindparam("b_user_id"), table.c.year == year)
+            .values(gross_total=table.c.gross_total + bindparam("b_delta"), periods=table.c.periods + sign),
+            [{"b_user_id": user_id, "b_delta": sign * gross[user_id]} for user_id in existing]
+        )
+
+    missing = [user_id for user_id in gross if user_id not in existing]
+    if sign > 0 and missing:
+        db.execute(table.insert(), [
+            {"user_id": user_id, "year": year, "gross_total": gross[user_id], "periods": 1}
+            for user_id in missing
+        ])
+    elif sign < 0:
+        # Workers with no period left in the year
+        db.query(AguinaldoAccrual).filter(
+            AguinaldoAccrual.year == year,
+            AguinaldoAccrual.user_id.in_(list(existing)),
+            AguinaldoAccrual.periods <= 0
+        ).delete(synchronize_session=False)
+
+
+def accrued_gross(db: Session, year: int, user_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+    """Stored gross per worker for an aguinaldo year (workers without a row are absent)."""
+    query = db.query(AguinaldoAccrual.user_id, AguinaldoAccrual.gross_total).filter(AguinaldoAccrual.year == year)
+    if user_ids is not None:
+        query = query.filter(AguinaldoAccrual.user_id.in_(list(user_ids)))
+    return {user_id: gross or 0.0 for user_id, gross in query}
+
+
+def accrued_through(db: Session, ref_date: date) -> Optional[date]:
+    """End of the latest final period counted in ref_date's aguinaldo year, up to ref_date."""
+    return db.query(func.max(PayrollPeriod.end_date)).filter(
+        PayrollPeriod.status == "final",
+        PayrollPeriod.end_date >= aguinaldo_year_start(aguinaldo_year(ref_date)),
+        PayrollPeriod.end_date <= ref_date
+    ).scalar()
+
+
+def compute_accruals(db: Session) -> Dict[tuple, dict]:
+    """
+    Aguinaldo gross straight from the final periods' entries.
+
+    :return: Dict of (user_id, year) -> {"gross_total", "periods"}
+    """
+    rows = db.query(
+        PayrollPeriod.end_date,
+        PayrollEntry.user_id,
+        func.sum(PayrollEntry.gross_salary)
+    ).join(PayrollEntry, PayrollEntry.payroll_period_id == PayrollPeriod.id)\
+     .filter(PayrollPeriod.status == "final")\
+     .group_by(PayrollPeriod.id, PayrollPeriod.end_date, PayrollEntry.user_id)
+
+    accruals = {}
+    for end_date, user_id, gross in rows:
+        accrual = accruals.setdefault((user_id, aguinaldo_year(end_date)), {"gross_total": 0.0, "periods": 0})
+        accrual["gross_total"] += float(gross or 0.0)
+        accrual["periods"] += 1
+    return accruals
+
+
+def rebuild_accruals(db: Session, verify_only: bool = False) -> List[dict]:
+    """
+    Recomputes every accrual from the final periods and reports drift.
+
+    :param db: Database session
+    :param verify_only: If True, only report differences without writing
+    :return: List of drift records {user_id, year, field, stored, actual}
+    """
+    actual = compute_accruals(db)
+    stored = {(a.user_id, a.year): a for a in db.query(AguinaldoAccrual).all()}
+
+    drift = []
+    for key, totals in actual.items():
+        accrual = stored.get(key)
+        for field in ("gross_total", "periods"):
+            stored_value = getattr(accrual, field) if accrual else None
+            if stored_value is None or abs(stored_value - totals[field]) > DRIFT_TOLERANCE:
+                drift.append({"user_id": key[0], "year": key[1], "field": field, "stored": stored_value, "actual": totals[field]})
+
+        if not verify_only:
+            if accrual is None:
+                accrual = AguinaldoAccrual(user_id=key[0], year=key[1])
+                db.add(accrual)
+            accrual.gross_total = totals["gross_total"]
+            accrual.periods = totals["periods"]
+
+    # Rows whose periods were deleted or never finalized
+    for key in set(stored) - set(actual):
+        drift.append({"user_id": key[0], "year": key[1], "field": "orphan", "stored": None, "actual": None})
+        if not verify_only:
+            db.delete(stored[key])
+
+    if not verify_only:
+        db.commit()
+
+    return drift
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.schedule import CalendarChange
+
+
+# Change journal behind /calendar/events/changes. Each calendar write appends
+# rows in its own transaction; a client keeps the last id it saw as its cursor.
+# SQLite has a single writer, so ids become visible in commit order. MySQL hands
+# out AUTO_INCREMENT ids at insert time, so a lower id can still be uncommitted
+# when a higher one is read; there the cursor only covers entries older than
+# CALENDAR_CHANGES_SETTLE_SECONDS and newer ones are sent on the next poll.
+
+def record_calendar_change(db: Session, entity: str, action: str, schedule_id: int, user_id: int, entity_id: Optional[int] = None):
+    db.add(CalendarChange(
+        entity=entity,
+        entity_id=entity_id if entity_id is not None else schedule_id,
+        action=action,
+        schedule_id=schedule_id,
+        user_id=user_id
+    ))
+
+
+def record_schedule_changes(db: Session, action: str, schedules: Iterable[Tuple[int, int]]):
+    """Bulk variant for (schedule_id, user_id) pairs, e.g. a multi-day assignment."""
+    rows = [
+        {"entity": "schedule", "entity_id": schedule_id, "action": action, "schedule_id": schedule_id, "user_id": user_id}
+        for schedule_id, user_id in schedules
+    ]
+    if rows:
+        db.execute(insert(CalendarChange), rows)
+
+
+def record_calendar_reset(db: Session):
+    """For changes visible on every event (renames): clients past this entry reload."""
+    db.add(CalendarChange(entity="calendar", action="reset"))
+
+
+def current_cursor(db: Session) -> int:
+    """
+    Highest id every client can safely move past. On MySQL, entries younger than
+    CALENDAR_CHANGES_SETTLE_SECONDS are left out so writes still in flight (a
+    lower id committing after a higher one) are not skipped. Compared with the
+    database clock, the same one that fills created_at.
+    """
+    query = db.query(func.max(CalendarChange.id))
+    if db.get_bind().dialect.name != "sqlite":
+        settle = int(settings.CALENDAR_CHANGES_SETTLE_SECONDS)
+        query = query.filter(CalendarChange.created_at <= func.date_sub(func.now(), text(f"INTERVAL {settle} SECOND")))
+    return query.scalar() or 0
+
+
+def changed_schedule_ids(db: Session, since: int, cursor: int, user_id: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Schedules touched in (since, cursor], optionally only those of one worker.
+    None means the client has to reload: a reset entry, a pruned or unknown
+    cursor, or more than CALENDAR_CHANGES_MAX schedules.
+    """
+    if since > cursor:
+        return None
+    if since == cursor:
+        return []
+
+    oldest = db.query(func.min(CalendarChange.id)).scalar()
+    if oldest is not None and since + 1 < oldest:
+        return None
+
+    query = db.query(CalendarChange.schedule_id, CalendarChange.entity).filter(
+        CalendarChange.id > since, CalendarChange.id <= cursor
+    )
+    if user_id is not None:
+        query = query.filter(or_(CalendarChange.user_id == user_id, CalendarChange.entity == "calendar"))
+
+    schedule_ids = set()
+    for schedule_id, entity in query:
+        if entity == "calendar":
+            return None
+        schedule_ids.add(schedule_id)
+        if len(schedule_ids) > settings.CALENDAR_CHANGES_MAX:
+            return None
+    return sorted(schedule_ids)
+
+
+def prune_calendar_changes(db: Session) -> int:
+    """
+    Drops entries older than CALENDAR_CHANGES_RETENTION_DAYS (scheduled job).
+    The newest entry is always kept so the cursor never goes back.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=settings.CALENDAR_CHANGES_RETENTION_DAYS)
+    newest = current_cursor(db)
+    count = db.query(CalendarChange).filter(
+        CalendarChange.created_at < cutoff,
+        CalendarChange.id < newest
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
@@ -0,0 +1,56 @@
+import hashlib
+from datetime import date
+from typing import Iterable, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.db.models.schedule import CalendarDayStamp
+
+
+def touch_calendar_days(db: Session, days: Iterable[date]):
+    """
+    Bumps the change stamp of each day, creating the row if needed.
+    Call in the same transaction as the schedule/task write so they commit together.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+
+    rows = [{"day": d, "stamp": 1} for d in days]
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(CalendarDayStamp).values(rows)
+        stmt = stmt.on_duplicate_key_update(stamp=CalendarDayStamp.stamp + 1)
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(CalendarDayStamp).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=["day"], set_={"stamp": CalendarDayStamp.stamp + 1})
+    db.execute(stmt)
+
+
+def touch_all_calendar_days(db: Session):
+    """
+    For changes visible on every day: a project or worker renamed or deleted.
+    Only moves days that have a row; migration 7 gave one to every scheduled day.
+    """
+    db.execute(update(CalendarDayStamp).values(stamp=CalendarDayStamp.stamp + 1))
+
+
+def range_stamp(db: Session, start, end) -> Tuple[int, int]:
+    """
+    (sum of stamps, number of stamped days) for a range. Stamps only grow, so any
+    write inside the range changes the pair. One index range scan on a table with
+    one row per day.
+    """
+    total, days = db.query(
+        func.coalesce(func.sum(CalendarDayStamp.stamp), 0),
+        func.count(CalendarDayStamp.day)
+    ).filter(CalendarDayStamp.day >= start, CalendarDayStamp.day <= end).one()
+    return int(total), int(days)
+
+
+def range_etag(*parts) -> str:
+    """Strong ETag from whatever identifies the response (viewer, range, stamps, format)."""
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
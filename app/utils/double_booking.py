@@ -0,0 +1,74 @@
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, aliased
+
+from app.db.models.schedule import ProjectSchedule
+from app.db.models.project import Project
+from app.db.models.user import User
+
+
+# Double booking = the same worker scheduled twice on the same day. Both checks
+# run on ix_project_schedules_user_date. Not a unique index: existing data may
+# already have duplicates and the "allow" policy must keep working.
+# The policy itself is settings.CALENDAR_DOUBLE_BOOKING_POLICY (validated there).
+
+
+def find_double_bookings(db: Session, user_ids: Iterable[int], days: Iterable[date], exclude_ids: Iterable[int] = ()) -> List[dict]:
+    """
+    Existing schedules that would collide with booking every user on every day,
+    in one query for the whole batch (range scan per worker, exact days filtered here).
+    """
+    user_ids, days = set(user_ids), set(days)
+    if not user_ids or not days:
+        return []
+
+    query = db.query(
+        ProjectSchedule.id, ProjectSchedule.user_id, ProjectSchedule.date,
+        Project.name, User.username, User.full_name
+    ).join(Project, Project.id == ProjectSchedule.project_id).join(User, User.id == ProjectSchedule.user_id).filter(
+        ProjectSchedule.user_id.in_(user_ids),
+        ProjectSchedule.date >= min(days),
+        ProjectSchedule.date <= max(days)
+    )
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query = query.filter(ProjectSchedule.id.notin_(exclude_ids))
+
+    return [
+        {
+            "schedule_id": schedule_id,
+            "user_id": user_id,
+            "date": day.isoformat(),
+            "project_name": project_name,
+            "worker_name": full_name or username
+        }
+        for schedule_id, user_id, day, project_name, username, full_name in query.order_by(ProjectSchedule.date, ProjectSchedule.user_id)
+        if day in days
+    ]
+
+
+def same_day_schedules(db: Session, user_id: int, day: date, exclude_id: Optional[int] = None) -> List[int]:
+    """Ids of the worker's other schedules that day (their conflict flag depends on this one)."""
+    query = db.query(ProjectSchedule.id).filter(ProjectSchedule.user_id == user_id, ProjectSchedule.date == day)
+    if exclude_id is not None:
+        query = query.filter(ProjectSchedule.id != exclude_id)
+    return [schedule_id for schedule_id, in query]
+
+
+def double_booked_column():
+    """Correlated EXISTS flag for a ProjectSchedule select (one index seek per row)."""
+    other = aliased(ProjectSchedule)
+    return exists().where(
+        other.user_id == ProjectSchedule.user_id,
+        other.date == ProjectSchedule.date,
+        other.id != ProjectSchedule.id
+    ).correlate(ProjectSchedule).label("double_booked")
+
+
+def conflicts_message(conflicts: List[dict], limit: int = 5) -> str:
+    lines = [f"{c['worker_name']} el {c['date']} ({c['project_name']})" for c in conflicts[:limit]]
+    if len(conflicts) > limit:
+        lines.append(f"y {len(conflicts) - limit} más")
+    return "Ya asignado: " + ", ".join(lines)
@@ -0,0 +1,219 @@
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models.finance import ProjectBudget, BudgetLine, Invoice, Payment, ProjectFinancialSummary
+
+# Tolerance used when comparing stored totals against a fresh recomputation
+DRIFT_TOLERANCE = 0.01
+
+
+def empty_budget_status(budget: Optional[ProjectBudget] = None) -> dict:
+    return {
+        "budget": budget,
+        "total_adjudicated": 0.0,
+        "total_invoiced": 0.0,
+        "total_paid": 0.0,
+        "balance": 0.0
+    }
+
+
+def compute_project_totals(db: Session, project_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+    """
+    Computes the budget status for a set of projects straight from the source tables.
+
+    Line totals, invoice totals and payment totals are aggregated per budget with
+    GROUP BY subqueries and joined onto the budgets, so the cost does not grow with
+    the number of projects (only with the number of rows scanned).
+
+    :param db: Database session
+    :param project_ids: Projects to summarize. None means every project with a budget.
+    :return: Dict of project_id -> same shape as finance.get_project_budget_status
+    """
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        if not project_ids:
+            return {}
+
+    # Tax calculation: subtotal + subtotal * (tax/100)
+    lines_sq = db.query(
+        BudgetLine.budget_id.label("budget_id"),
+        func.sum(BudgetLine.subtotal * (1 + BudgetLine.tax_percentage / 100.0)).label("total")
+    ).group_by(BudgetLine.budget_id).subquery()
+
+    invoices_sq = db.query(
+        Invoice.budget_id.label("budget_id"),
+        func.sum(Invoice.amount).label("total")
+    ).group_by(Invoice.budget_id).subquery()
+
+    payments_sq = db.query(
+        Invoice.budget_id.label("budget_id"),
+        func.sum(Payment.amount).label("total")
+    ).join(Payment, Payment.invoice_id == Invoice.id)\
+     .group_by(Invoice.budget_id).subquery()
+
+    query = db.query(
+        ProjectBudget,
+        func.coalesce(lines_sq.c.total, 0.0),
+        func.coalesce(invoices_sq.c.total, 0.0),
+        func.coalesce(payments_sq.c.total, 0.0)
+    ).outerjoin(lines_sq, lines_sq.c.budget_id == ProjectBudget.id)\
+     .outerjoin(invoices_sq, invoices_sq.c.budget_id == ProjectBudget.id)\
+     .outerjoin(payments_sq, payments_sq.c.budget_id == ProjectBudget.id)
+
+    if project_ids is not None:
+        query = query.filter(ProjectBudget.project_id.in_(project_ids))
+
+    summaries = {}
+    for budget, lines_total, invoiced, paid in query.all():
+        total_adjudicated = float(lines_total)
+
+        # Add Prorogue
+        if budget.is_prorrogable and budget.active_prorogue:
+            total_adjudicated += budget.prorrogable_amount or 0.0
+
+        summaries[budget.project_id] = {
+            "budget": budget,
+            "total_adjudicated": total_adjudicated,
+            "total_invoiced": float(invoiced),
+            "total_paid": float(paid),
+            "balance": total_adjudicated - float(invoiced)
+        }
+
+    return summaries
+
+
+def get_budget_summaries(db: Session, project_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+    """
+    Reads the budget status for a set of projects from project_financial_summaries.
+
+    Projects whose summary row is missing (e.g. created before the table existed)
+    are computed live with compute_project_totals, so callers always get a full answer.
+
+    :param db: Database session
+    :param project_ids: Projects to summarize. None means every project with a budget.
+    :return: Dict of project_id -> same shape as finance.get_project_budget_status
+    """
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        if not project_ids:
+            return {}
+
+    query = db.query(ProjectBudget, ProjectFinancialSummary)\
+        .outerjoin(ProjectFinancialSummary, ProjectFinancialSummary.project_id == ProjectBudget.project_id)
+
+    if project_ids is not None:
+        query = query.filter(ProjectBudget.project_id.in_(project_ids))
+
+    summaries = {}
+    missing = []
+    for budget, summary in query.all():
+        if summary is None:
+            missing.append(budget.project_id)
+            continue
+
+        summaries[budget.project_id] = {
+            "budget": budget,
+            "total_adjudicated": summary.total_adjudicated or 0.0,
+            "total_invoiced": summary.total_invoiced or 0.0,
+            "total_paid": summary.total_paid or 0.0,
+            "balance": summary.balance or 0.0
+        }
+
+    if missing:
+        summaries.update(compute_project_totals(db, missing))
+
+    # Projects without a budget keep the zeroed contract
+    if project_ids is not None:
+        for pid in project_ids:
+            if pid not in summaries:
+                summaries[pid] = empty_budget_status()
+
+    return summaries
+
+
+def _store_totals(db: Session, project_id: int, totals: dict) -> ProjectFinancialSummary:
+    summary = db.query(ProjectFinancialSummary).get(project_id)
+    if not summary:
+        summary = ProjectFinancialSummary(project_id=project_id)
+        db.add(summary)
+
+    summary.total_adjudicated = totals["total_adjudicated"]
+    summary.total_invoiced = totals["total_invoiced"]
+    summary.total_paid = totals["total_paid"]
+    summary.balance = totals["balance"]
+    return summary
+
+
+def refresh_project_summary(db: Session, project_id: int):
+    """
+    Recomputes the stored summary of one project inside the caller's transaction.
+
+    Used when budget lines or prorogue settings are rewritten (project create/edit),
+    where a delta is not available. The caller is responsible for committing.
+    """
+    db.flush()
+    totals = compute_project_totals(db, [project_id]).get(project_id)
+    if totals is None:
+        return
+    _store_totals(db, project_id, totals)
+
+
+def apply_summary_delta(db: Session, project_id: int, invoiced: float = 0.0, paid: float = 0.0):
+    """
+    Adds invoice/payment amounts to the stored summary of a project.
+
+    The update is a single relative UPDATE, so concurrent writers don't lose
+    increments. If the project has no summary row yet it is built from scratch,
+    which already includes the pending change. The caller is responsible for committing.
+    """
+    updated = db.query(ProjectFinancialSummary)\
+        .filter(ProjectFinancialSummary.project_id == project_id)\
+        .update({
+            ProjectFinancialSummary.total_invoiced: ProjectFinancialSummary.total_invoiced + invoiced,
+            ProjectFinancialSummary.total_paid: ProjectFinancialSummary.total_paid + paid,
+            ProjectFinancialSummary.balance: ProjectFinancialSummary.balance - invoiced
+        }, synchronize_session=False)
+
+    if not updated:
+        refresh_project_summary(db, project_id)
+
+
+def rebuild_summaries(db: Session, verify_only: bool = False) -> List[dict]:
+    """
+    Recomputes every project summary from scratch and reports drift.
+
+    :param db: Database session
+    :param verify_only: If True, only report differences without writing
+    :return: List of drift records {project_id, field, stored, actual}
+    """
+    actual = compute_project_totals(db)
+    stored = {s.project_id: s for s in db.query(ProjectFinancialSummary).all()}
+
+    fields = ["total_adjudicated", "total_invoiced", "total_paid", "balance"]
+    drift = []
+    for project_id, totals in actual.items():
+        summary = stored.get(project_id)
+        for field in fields:
+            stored_value = getattr(summary, field) if summary else None
+            if stored_value is None or abs(stored_value - totals[field]) > DRIFT_TOLERANCE:
+                drift.append({
+                    "project_id": project_id,
+                    "field": field,
+                    "stored": stored_value,
+                    "actual": totals[field]
+                })
+
+        if not verify_only:
+            _store_totals(db, project_id, totals)
+
+    # Summaries left behind by deleted budgets
+    for project_id in set(stored) - set(actual):
+        drift.append({"project_id": project_id, "field": "orphan", "stored": None, "actual": None})
+        if not verify_only:
+            db.delete(stored[project_id])
+
+    if not verify_only:
+        db.commit()
+
+    return drift
@@ -0,0 +1,18 @@
+from typing import Iterator, List, Optional
+
+import orjson
+
+
+def iter_json_list(key: str, rows: List[dict], extra: Optional[dict] = None, chunk_size: int = 500) -> Iterator[bytes]:
+    """
+    {"<key>": [rows...], **extra} as a StreamingResponse body, encoded with orjson
+    a chunk of rows at a time so large lists never exist as one string.
+    """
+    yield b'{' + orjson.dumps(key) + b':['
+    for start in range(0, len(rows), chunk_size):
+        chunk = b",".join(orjson.dumps(row) for row in rows[start:start + chunk_size])
+        yield chunk if start == 0 else b"," + chunk
+    yield b']'
+    for name, value in (extra or {}).items():
+        yield b',' + orjson.dumps(name) + b':' + orjson.dumps(value)
+    yield b'}'
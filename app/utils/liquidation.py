@@ -0,0 +1,168 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.payment import PayrollPayment
+from app.db.models.user import User
+from app.db.models.vacation import VacationBalance
+from app.utils.aguinaldo import AGUINALDO_MONTHS, aguinaldo_year, aguinaldo_year_start
+
+
+# Liquidation estimate (vacation, aguinaldo, salary due) for any number of
+# workers at once: one GROUP BY for the last payment dates, one read each of
+# the aguinaldo accruals and vacation balances, then every formula over columns. The single-worker
+# preview is the same computation with one row.
+
+DAYS_PER_MONTH = 30.44 # Average month length for months worked
+DAILY_HOURS = 8 # Unpaid days are counted at 8 hours
+
+
+def last_payment_dates(db: Session, user_ids: Optional[Iterable[int]] = None) -> Dict[int, date]:
+    """Latest PayrollPayment date per worker (ix_payroll_payments_user_date)."""
+    query = db.query(PayrollPayment.user_id, func.max(PayrollPayment.date)).group_by(PayrollPayment.user_id)
+    if user_ids is not None:
+        query = query.filter(PayrollPayment.user_id.in_(list(user_ids)))
+    return dict(query.all())
+
+
+def _days_until(ref_date: date, days: Sequence[Optional[date]]) -> np.ndarray:
+    # ref_date - day in days, NaN where the date is missing
+    ref = np.datetime64(ref_date, "D")
+    dates = np.array([np.datetime64(d, "D") if d else np.datetime64("NaT") for d in days], dtype="datetime64[D]")
+    delta = (ref - dates).astype("timedelta64[D]")
+    return np.where(np.isnat(delta), np.nan, delta.astype(float))
+
+
+def compute_liquidations(
+    start_dates: Sequence[Optional[date]],
+    last_payments: Sequence[Optional[date]],
+    monthly_salaries: Sequence[Optional[float]],
+    hourly_rates: Sequence[Optional[float]],
+    ref_date: date,
+    accrued: Optional[Sequence[Optional[float]]] = None,
+    accrued_through: Optional[date] = None,
+    vacation_balances: Optional[Sequence[Optional[float]]] = None,
+    vacation_through: Optional[Sequence[Optional[date]]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Liquidation amounts per worker, aligned with the inputs (unrounded).
+
+    - Vacations: the ledger balance (vacation_balances, None for workers
+      without one) adjusted by the days from vacation_through to ref_date; otherwise
+      VACATION_DAYS_PER_MONTH per month worked. Paid at monthly salary / 30.
+    - Aguinaldo: gross from finalized payrolls of the current aguinaldo year
+      (accrued, None for workers without any) / 12, plus monthly salary / 12 per
+      month worked this year not covered by them (after accrued_through).
+    - Salary due: 8 hours a day at the hourly rate (or monthly / 30 / 8) for the
+      days after the last payment, or since the start date (inclusive) when the
+      worker was never paid.
+    """
+    monthly = np.array([m or 0.0 for m in monthly_salaries], dtype=float)
+    hourly = np.array([h or 0.0 for h in hourly_rates], dtype=float)
+
+    since_start = _days_until(ref_date, start_dates)
+    since_payment = _days_until(ref_date, last_payments)
+
+    with np.errstate(invalid="ignore"):
+        months_worked = np.where(since_start > 0, since_start / DAYS_PER_MONTH, 0.0)
+        paid = ~np.isnan(since_payment)
+        days_pending = np.where(
+            paid,
+            np.where(since_payment > 0, since_payment, 0.0),
+            np.where(since_start >= 0, since_start + 1, 0.0)
+        )
+
+    # Aguinaldo: exact part from the accruals, estimate for the rest of the year
+    accrued_gross = np.array([np.nan if a is None else a for a in (accrued or [None] * len(monthly))], dtype=float)
+    has_accrual = ~np.isnan(accrued_gross)
+    tail_days = np.minimum(since_start, (ref_date - aguinaldo_year_start(aguinaldo_year(ref_date))).days)
+    if accrued_through is not None:
+        tail_days = np.where(has_accrual, np.minimum(tail_days, (ref_date - accrued_through).days), tail_days)
+    with np.errstate(invalid="ignore"):
+        tail_months = np.where(tail_days > 0, tail_days / DAYS_PER_MONTH, 0.0)
+
+    # Vacations: stored balance plus the current month(s), or the estimate
+    per_month = settings.VACATION_DAYS_PER_MONTH
+    balance = np.array([np.nan if b is None else b for b in (vacation_balances or [None] * len(monthly))], dtype=float)
+    since_accrual = _days_until(ref_date, vacation_through or [None] * len(monthly))
+    # Negative when ref_date is before the last accrual: those months come back out
+    with np.errstate(invalid="ignore"):
+        accruing_days = np.where(np.isnan(since_accrual), np.where(since_start > 0, since_start, 0.0), since_accrual)
+    accruing = accruing_days / DAYS_PER_MONTH * per_month
+    vacation_days = np.where(np.isnan(balance), months_worked * per_month, balance + accruing)
+    vacation_amount = monthly / 30 * vacation_days
+    aguinaldo_amount = np.where(has_accrual, accrued_gross, 0.0) / AGUINALDO_MONTHS + monthly / AGUINALDO_MONTHS * tail_months
+    rate = np.where(hourly > 0, hourly, monthly / 30 / DAILY_HOURS)
+    salary_due = days_pending * DAILY_HOURS * rate
+
+    return {
+        "months_worked": months_worked,
+        "vacation_days": vacation_days,
+        "vacation_amount": vacation_amount,
+        "aguinaldo_amount": aguinaldo_amount,
+        "salary_due": salary_due,
+        "total": vacation_amount + aguinaldo_amount + salary_due,
+    }
+
+
+def liquidation_rows(
+    users: List[User],
+    last_payments: Dict[int, date],
+    ref_date: date,
+    start_dates: Optional[Dict[int, date]] = None,
+    accrued: Optional[Dict[int, float]] = None,
+    accrued_through: Optional[date] = None,
+    vacations: Optional[Dict[int, VacationBalance]] = None
+) -> List[dict]:
+    """
+    Liquidation preview per worker (the shape /liquidation/preview returns).
+
+    :param start_dates: Start date overrides per user id (the "start of unpaid
+        period" field of the preview); otherwise the worker's start_date
+    :param accrued: Aguinaldo gross per user id for ref_date's year
+        (app.utils.aguinaldo.accrued_gross)
+    :param accrued_through: End of the latest final period those include
+    :param vacations: Vacation balances per user id
+        (app.utils.vacations.vacation_balances); ignored for workers with a start
+        date override, whose vacations are estimated from it
+    """
+    start_dates = start_dates or {}
+    vacations = {
+        user_id: balance for user_id, balance in (vacations or {}).items()
+        if not start_dates.get(user_id)
+    }
+    effective_start = [start_dates.get(u.id) or u.start_date for u in users]
+    amounts = compute_liquidations(
+        effective_start,
+        [last_payments.get(u.id) for u in users],
+        [u.monthly_salary for u in users],
+        [u.hourly_rate for u in users],
+        ref_date,
+        [(accrued or {}).get(u.id) for u in users],
+        accrued_through,
+        [vacations[u.id].balance if u.id in vacations else None for u in users],
+        [vacations[u.id].accrued_through if u.id in vacations else None for u in users]
+    )
+    columns = {key: values.tolist() for key, values in amounts.items()}
+
+    return [
+        {
+            "user_id": u.id,
+            "name": u.full_name,
+            "identity_card": None, # Field does not exist in User model yet
+            "start_date": effective_start[i], # Return the one used
+            "monthly_salary": u.monthly_salary,
+            "months_worked": round(columns["months_worked"][i], 2),
+            "vacation_days": round(columns["vacation_days"][i], 2),
+            "vacation_amount": round(columns["vacation_amount"][i], 2),
+            "aguinaldo_amount": round(columns["aguinaldo_amount"][i], 2),
+            "salary_due": round(columns["salary_due"][i], 2),
+            "total": round(columns["total"][i], 2),
+            "calculation_date": ref_date
+        }
+        for i, u in enumerate(users)
+    ]
@@ -0,0 +1,189 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.payroll import PayrollPeriod, PayrollEntry, PayrollDirtyCell
+from app.db.models.project import Project
+from app.db.models.schedule import ProjectSchedule
+from app.db.models.user import User
+from app.utils.payroll_rules import compute_payroll
+
+
+# Payroll entries of a draft period are built from confirmed schedules. When
+# hours change afterwards, the (worker, day) cell is recorded as dirty and only
+# those workers' entries are rebuilt, on demand or right away when
+# PAYROLL_AUTO_RECOMPUTE is on.
+
+def compute_entries(
+    db: Session,
+    period_id: int,
+    start: date,
+    end: date,
+    user_ids: Optional[Iterable[int]] = None,
+    deductions: Optional[Dict[int, bool]] = None
+) -> List[dict]:
+    """
+    Entry rows (ready for a bulk insert) for every worker with confirmed hours
+    in the range: one GROUP BY for the totals, one joined query for the per-day
+    breakdown. Workers that no longer exist drop out of the inner join.
+
+    :param user_ids: Only these workers (recompute). None means everyone (generate).
+    :param deductions: apply_deductions per worker overriding the worker's default
+        (keeps what the admin set on an existing entry).
+    """
+    in_period = [
+        ProjectSchedule.date >= start,
+        ProjectSchedule.date <= end,
+        ProjectSchedule.is_confirmed == True
+    ]
+    if user_ids is not None:
+        in_period.append(ProjectSchedule.user_id.in_(list(user_ids)))
+    deductions = deductions or {}
+
+    totals = db.query(
+        ProjectSchedule.user_id,
+        func.sum(ProjectSchedule.hours_worked),
+        func.sum(func.coalesce(ProjectSchedule.overtime_hours, 0.0)),
+        User.hourly_rate,
+        User.apply_deductions
+    ).join(User, User.id == ProjectSchedule.user_id).filter(*in_period).group_by(
+        ProjectSchedule.user_id, User.hourly_rate, User.apply_deductions
+    ).all()
+    if not totals:
+        return []
+
+    # Breakdown per worker (details show the project name)
+    details = {}
+    detail_rows = db.query(
+        ProjectSchedule.user_id, ProjectSchedule.date, ProjectSchedule.hours_worked, ProjectSchedule.overtime_hours, Project.name
+    ).outerjoin(Project, Project.id == ProjectSchedule.project_id).filter(*in_period).order_by(
+        ProjectSchedule.user_id, ProjectSchedule.date, ProjectSchedule.id
+    )
+    for uid, day, hours, overtime, project_name in detail_rows:
+        details.setdefault(uid, []).append({
+            "date": day.isoformat(),
+            "hours": hours,
+            "overtime": overtime,
+            "project": project_name or "Unknown"
+        })
+
+    flags = [deductions.get(uid, apply_deductions) for uid, _, _, _, apply_deductions in totals]
+    amounts = compute_payroll(
+        [row[1] for row in totals],
+        [row[2] for row in totals],
+        [row[3] for row in totals],
+        flags,
+        on=start
+    )
+    return [
+        {
+            "payroll_period_id": period_id,
+            "user_id": uid,
+            "total_hours": total_hours,
+            "overtime_hours": overtime_hours,
+            "gross_salary": gross,
+            "social_charges": charges,
+            "net_salary": net,
+            "apply_deductions": apply_deductions,
+            "details": details.get(uid, []) # JSON
+        }
+        for (uid, total_hours, overtime_hours, _, _), apply_deductions, gross, charges, net in zip(
+            totals,
+            flags,
+            amounts["gross"].tolist(),
+            amounts["social_charges"].tolist(),
+            amounts["net"].tolist()
+        )
+    ]
+
+
+def mark_payroll_dirty(db: Session, cells: Iterable[Tuple[int, date]]) -> List[int]:
+    """
+    Records (user_id, day) cells whose hours changed in every draft period that
+    covers them. Final periods are never touched. Call in the same transaction
+    as the schedule write.
+
+    :return: Ids of the draft periods affected
+    """
+    cells = set(cells)
+    if not cells:
+        return []
+    days = [day for _, day in cells]
+    periods = db.query(PayrollPeriod.id, PayrollPeriod.start_date, PayrollPeriod.end_date).filter(
+        PayrollPeriod.status == "draft",
+        PayrollPeriod.start_date <= max(days),
+        PayrollPeriod.end_date >= min(days)
+    ).all()
+
+    rows = [
+        {"payroll_period_id": period_id, "user_id": user_id, "date": day}
+        for period_id, start, end in periods
+        for user_id, day in cells
+        if start <= day <= end
+    ]
+    if not rows:
+        return []
+
+    if db.get_bind().dialect.name == "mysql":
+        stmt = insert(PayrollDirtyCell).prefix_with("IGNORE")
+    else:
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(PayrollDirtyCell).on_conflict_do_nothing()
+    db.execute(stmt, rows)
+
+    period_ids = sorted({row["payroll_period_id"] for row in rows})
+    if settings.PAYROLL_AUTO_RECOMPUTE:
+        for period_id in period_ids:
+            recompute_period(db, period_id)
+    return period_ids
+
+
+def stale_user_ids(db: Session, period_id: int) -> List[int]:
+    return [user_id for user_id, in db.query(PayrollDirtyCell.user_id).filter(
+        PayrollDirtyCell.payroll_period_id == period_id
+    ).distinct()]
+
+
+def recompute_period(db: Session, period_id: int) -> int:
+    """
+    Rebuilds the entries of the period's dirty workers only (same queries as
+    generation, restricted to those workers) and clears their dirty cells.
+    Workers left without confirmed hours lose their entry; newly confirmed ones
+    get one.
+
+    :return: Number of workers recomputed
+    """
+    period = db.get(PayrollPeriod, period_id)
+    user_ids = stale_user_ids(db, period_id)
+    if period is None or period.status != "draft" or not user_ids:
+        return 0
+
+    existing = {
+        user_id: (entry_id, apply_deductions)
+        for user_id, entry_id, apply_deductions in db.query(
+            PayrollEntry.user_id, PayrollEntry.id, PayrollEntry.apply_deductions
+        ).filter(PayrollEntry.payroll_period_id == period_id, PayrollEntry.user_id.in_(user_ids))
+    }
+    fresh = compute_entries(
+        db, period_id, period.start_date, period.end_date, user_ids,
+        deductions={user_id: flag for user_id, (_, flag) in existing.items()}
+    )
+
+    updates = [{"id": existing[row["user_id"]][0], **row} for row in fresh if row["user_id"] in existing]
+    inserts = [row for row in fresh if row["user_id"] not in existing]
+    removed = set(existing) - {row["user_id"] for row in fresh}
+    if updates:
+        db.execute(update(PayrollEntry), updates)
+    if inserts:
+        db.execute(insert(PayrollEntry), inserts)
+    if removed:
+        db.execute(delete(PayrollEntry).where(PayrollEntry.id.in_([existing[user_id][0] for user_id in removed])))
+
+    db.execute(delete(PayrollDirtyCell).where(
+        PayrollDirtyCell.payroll_period_id == period_id,
+        PayrollDirtyCell.user_id.in_(user_ids)
+    ))
+    return len(user_ids)
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert, or_, update
+
+from app.core import job_pool
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models.payroll import PayrollPeriod, PayrollEntry, PayrollJob
+from app.db.models.user import User
+from app.utils.activity import log_activity
+from app.utils.payroll_entries import compute_entries
+
+
+# Payroll generation as a job: /payroll/generate stores a PayrollJob and hands
+# its id to the worker pool; clients poll /payroll/jobs/{id} or subscribe to
+# /payroll/jobs/{id}/events. The draft period it creates is the same one the
+# synchronous endpoint used to create.
+
+FINISHED = ("done", "failed")
+
+
+def job_status(job: PayrollJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "start_date": job.start_date.isoformat(),
+        "end_date": job.end_date.isoformat(),
+        "period_id": job.payroll_period_id,
+        "processed_users": job.processed_users or 0,
+        "elapsed_ms": job.elapsed_ms,
+        "error": job.error
+    }
+
+
+def run_payroll_job(job_id: int):
+    """
+    Generates the draft period of a queued job (in a pool thread, own Session).
+    Claiming is a conditional UPDATE, so a job resumed twice only runs once.
+    """
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        claimed = db.execute(
+            update(PayrollJob).where(PayrollJob.id == job_id, PayrollJob.status == "queued")
+            .values(status="running", started_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+
+        job = db.get(PayrollJob, job_id)
+        try:
+            period = PayrollPeriod(start_date=job.start_date, end_date=job.end_date, status="draft")
+            db.add(period)
+            db.flush()
+
+            entries = compute_entries(db, period.id, job.start_date, job.end_date)
+            if entries:
+                db.execute(insert(PayrollEntry), entries)
+
+            job.payroll_period_id = period.id
+            job.processed_users = len(entries)
+            job.status = "done"
+        except Exception as e:
+            print(f"Payroll job {job_id} failed: {e}")
+            db.rollback()
+            job = db.get(PayrollJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+        job.elapsed_ms = (time.perf_counter() - start) * 1000
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+        creator = db.get(User, job.created_by) if job.created_by else None
+        if job.status == "done" and creator:
+            log_activity(db, creator, "Generar Planilla", "PAYROLL", job.payroll_period_id, f"Periodo: {job.start_date.isoformat()} - {job.end_date.isoformat()}")
+    except Exception as e:
+        print(f"Error running payroll job {job_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def submit_payroll_job(job_id: int) -> Future:
+    return job_pool.submit(run_payroll_job, job_id)
+
+
+def resume_payroll_jobs() -> List[int]:
+    """
+    Re-submits jobs a previous process left queued or running (generation commits
+    in one transaction, so an interrupted job left nothing behind). Only the
+    process that runs background jobs should call this.
+
+    Other processes may still be running their own jobs, so only jobs running for
+    longer than PAYROLL_JOB_STALE_MINUTES are taken as abandoned. Queued ones are
+    safe to submit again: claiming is conditional, only one process runs each.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.PAYROLL_JOB_STALE_MINUTES)
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(PayrollJob)
+            .where(
+                PayrollJob.status == "running",
+                or_(PayrollJob.started_at.is_(None), PayrollJob.started_at < cutoff)
+            )
+            .values(status="queued")
+        )
+        db.commit()
+        job_ids = [job_id for job_id, in db.query(PayrollJob.id).filter(PayrollJob.status == "queued").order_by(PayrollJob.id)]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        submit_payroll_job(job_id)
+    return job_ids
@@ -0,0 +1,111 @@
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+
+# Payroll rules in one place. Every endpoint hands over whole columns (one value
+# per entry) and gets every derived amount back from a single vectorized pass,
+# so a period costs the same handful of array operations whatever its size.
+
+class PayrollRates(NamedTuple):
+    effective_from: date
+    overtime_multiplier: float
+    social_charges: float  # Worker share (CCSS), only when apply_deductions
+    cs_empresa: float  # Employer share
+    previsiones: float  # Aguinaldo, vacations, etc. provisions
+    rounding: int  # Gross, charges and overtime are rounded to this amount
+
+
+# Sorted by effective_from. A period uses the rates in force on its start date;
+# add a new row (never edit an old one) when the law changes.
+RATE_TABLE = [
+    PayrollRates(date(2000, 1, 1), overtime_multiplier=1.5, social_charges=0.0917, cs_empresa=0.2667, previsiones=0.18, rounding=100),
+]
+
+
+def rates_for(day: Optional[date] = None) -> PayrollRates:
+    """Rates in force on the given day (today by default)."""
+    day = day or date.today()
+    index = bisect_right([r.effective_from for r in RATE_TABLE], day) - 1
+    return RATE_TABLE[max(index, 0)]
+
+
+def _column(values: Iterable, dtype=float) -> np.ndarray:
+    # NULL columns (old rows, workers without a rate) count as 0 / False
+    return np.array([v or 0 for v in values], dtype=dtype)
+
+
+def _round(values: np.ndarray, step: int) -> np.ndarray:
+    # np.round rounds half to even, same as the built-in round() used before
+    return np.round(values / step) * step
+
+
+def _social_charges(gross: np.ndarray, apply_deductions: Iterable[bool], rates: PayrollRates) -> np.ndarray:
+    return np.where(_column(apply_deductions, bool), _round(gross * rates.social_charges, rates.rounding), 0.0)
+
+
+def compute_deductions(
+    gross: Iterable[float],
+    apply_deductions: Iterable[bool],
+    on: Optional[date] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Worker social charges and net for stored gross salaries, for when only the
+    deductions toggle changes and hours and rates don't matter.
+
+    :return: Dict of column name -> array: social_charges, net
+    """
+    gross = _column(gross)
+    social_charges = _social_charges(gross, apply_deductions, rates_for(on))
+    return {"social_charges": social_charges, "net": gross - social_charges}
+
+
+def compute_payroll(
+    hours: Iterable[float],
+    overtime_hours: Iterable[float],
+    hourly_rates: Iterable[float],
+    apply_deductions: Iterable[bool],
+    on: Optional[date] = None,
+    gross: Optional[Iterable[float]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Derived amounts for a batch of payroll entries.
+
+    :param hours: Regular hours per entry
+    :param overtime_hours: Overtime hours per entry
+    :param hourly_rates: Worker rate per entry
+    :param apply_deductions: Whether worker social charges apply, per entry
+    :param on: Date that picks the rate table (the period start)
+    :param gross: Stored gross salaries. When given they are used as they are
+        (detail and report work from the generated figure);
+        otherwise gross is computed from hours and rates (generation).
+    :return: Dict of column name -> array, aligned with the inputs: gross,
+        overtime_amount, regular_amount, social_charges, net, cs_empresa,
+        previsiones, company_cost
+    """
+    rates = rates_for(on)
+    hourly_rates = _column(hourly_rates)
+    overtime_pay = _column(overtime_hours) * hourly_rates * rates.overtime_multiplier
+
+    if gross is None:
+        gross = _round(_column(hours) * hourly_rates + overtime_pay, rates.rounding)
+    else:
+        gross = _column(gross)
+
+    overtime_amount = _round(overtime_pay, rates.rounding)
+    social_charges = _social_charges(gross, apply_deductions, rates)
+    cs_empresa = gross * rates.cs_empresa
+    previsiones = gross * rates.previsiones
+
+    return {
+        "gross": gross,
+        "overtime_amount": overtime_amount,
+        "regular_amount": gross - overtime_amount,
+        "social_charges": social_charges,
+        "net": gross - social_charges,
+        "cs_empresa": cs_empresa,
+        "previsiones": previsiones,
+        "company_cost": gross + cs_empresa + previsiones,
+    }
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+# Recurrence rules for multi-day assignments (calendar.create_schedule).
+# Expanded in memory so the whole range is persisted with bulk inserts.
+
+FREQUENCIES = {
+    "daily": "Todos los días",
+    "weekdays": "Lunes a viernes",
+    "weekly": "Días específicos",
+    "interval": "Cada N días",
+}
+
+
+def parse_dates(value: str) -> List[date]:
+    """Comma separated YYYY-MM-DD list (exclusion dates from the form)."""
+    dates = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            dates.append(datetime.strptime(part, "%Y-%m-%d").date())
+        except ValueError:
+            raise ValueError(f"Fecha inválida: {part}")
+    return dates
+
+
+def expand_recurrence(
+    start: date,
+    end: date,
+    frequency: str = "daily",
+    weekdays: Optional[Iterable[int]] = None,
+    interval: int = 1,
+    exclude: Optional[Iterable[date]] = None
+) -> List[date]:
+    """
+    Days from start to end (inclusive) matching the rule, minus the exclusions.
+    weekdays uses Python numbering (0 = Monday) and only applies to "weekly";
+    interval counts from start and only applies to "interval".
+    Raises ValueError (message shown to the user) on an invalid rule.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Recurrencia desconocida: {frequency}")
+    if end < start:
+        raise ValueError("La fecha final no puede ser menor a la inicial")
+
+    step = 1
+    allowed = None
+    if frequency == "weekdays":
+        allowed = {0, 1, 2, 3, 4}
+    elif frequency == "weekly":
+        allowed = set(weekdays or [])
+        if not allowed or not allowed <= set(range(7)):
+            raise ValueError("Seleccione al menos un día de la semana")
+    elif frequency == "interval":
+        if interval < 1:
+            raise ValueError("El intervalo debe ser de al menos 1 día")
+        step = interval
+
+    excluded = set(exclude or [])
+    days = []
+    for offset in range(0, (end - start).days + 1, step):
+        day = start + timedelta(days=offset)
+        if allowed is not None and day.weekday() not in allowed:
+            continue
+        if day not in excluded:
+            days.append(day)
+    return days
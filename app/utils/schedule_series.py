@@ -0,0 +1,92 @@
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.schedule import ProjectSchedule, ScheduleSeries, SeriesTask, ScheduleTaskCompletion
+
+
+# Schedule series: a range assignment keeps its task template once (SeriesTask)
+# and each day only stores which of those tasks are done (ScheduleTaskCompletion).
+# Days edited on their own are detached and get plain ScheduleTask rows again.
+
+def task_item(task_id: int, title: Optional[str], description: str, completed: bool, schedule_id: Optional[int] = None) -> dict:
+    """Task as sent to the calendar/dashboard JS. schedule_id marks a series task."""
+    if schedule_id is None:
+        toggle_url = f"/calendar/task/{task_id}/toggle"
+    else:
+        toggle_url = f"/calendar/schedule/{schedule_id}/series-task/{task_id}/toggle"
+    return {"id": task_id, "title": title, "description": description, "completed": completed, "toggle_url": toggle_url}
+
+
+def schedule_task_items(schedule: ProjectSchedule) -> List[dict]:
+    """
+    Tasks of one loaded schedule (tasks, series.tasks and completions must be
+    eager-loaded on async sessions).
+    """
+    items = [task_item(t.id, t.title, t.description, t.completed) for t in schedule.tasks]
+    if schedule.series is not None:
+        done = {c.series_task_id for c in schedule.completions}
+        items += [task_item(t.id, t.title, t.description, t.id in done, schedule.id) for t in schedule.series.tasks]
+    return items
+
+
+def create_series(db: Session, project_id: int, tasks: Sequence[Tuple[str, str]]) -> int:
+    """Creates a series with its task template; returns the series id."""
+    series = ScheduleSeries(project_id=project_id)
+    db.add(series)
+    db.flush()
+    if tasks:
+        db.execute(insert(SeriesTask), [
+            {"series_id": series.id, "position": i, "title": title, "description": desc}
+            for i, (title, desc) in enumerate(tasks)
+        ])
+    return series.id
+
+
+def update_series(db: Session, series_id: int, project_id: int, tasks: Sequence[Tuple[str, str]]) -> List[Tuple[int, int, date]]:
+    """
+    Applies project and task template to every day of the series: one UPDATE for
+    the days plus one statement per template task, whatever the range length.
+    Tasks are matched by position, so days keep their completion state when a
+    task is only reworded. Returns (schedule_id, user_id, date) of the days.
+    """
+    db.execute(update(ScheduleSeries).where(ScheduleSeries.id == series_id).values(project_id=project_id))
+    db.execute(update(ProjectSchedule).where(ProjectSchedule.series_id == series_id).values(project_id=project_id))
+
+    current = db.query(SeriesTask).filter(SeriesTask.series_id == series_id).order_by(SeriesTask.position).all()
+    for position, (title, desc) in enumerate(tasks):
+        if position < len(current):
+            current[position].title = title
+            current[position].description = desc
+        else:
+            db.add(SeriesTask(series_id=series_id, position=position, title=title, description=desc))
+
+    removed = [t.id for t in current[len(tasks):]]
+    if removed:
+        db.execute(delete(ScheduleTaskCompletion).where(ScheduleTaskCompletion.series_task_id.in_(removed)))
+        db.execute(delete(SeriesTask).where(SeriesTask.id.in_(removed)))
+    db.flush()
+
+    return db.query(ProjectSchedule.id, ProjectSchedule.user_id, ProjectSchedule.date).filter(
+        ProjectSchedule.series_id == series_id
+    ).all()
+
+
+def detach_from_series(db: Session, schedule: ProjectSchedule):
+    """Takes one day out of its series (it gets its own tasks from now on)."""
+    series_id = schedule.series_id
+    db.execute(delete(ScheduleTaskCompletion).where(ScheduleTaskCompletion.schedule_id == schedule.id))
+    schedule.series_id = None
+    db.flush()
+    delete_series_if_empty(db, series_id)
+
+
+def delete_series_if_empty(db: Session, series_id: Optional[int]):
+    if series_id is None:
+        return
+    remaining = db.query(func.count(ProjectSchedule.id)).filter(ProjectSchedule.series_id == series_id).scalar()
+    if not remaining:
+        db.execute(delete(SeriesTask).where(SeriesTask.series_id == series_id))
+        db.execute(delete(ScheduleSeries).where(ScheduleSeries.id == series_id))
@@ -0,0 +1,164 @@
+import calendar
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.user import User
+from app.db.models.vacation import VacationEntry, VacationBalance
+
+
+# Vacation days as a ledger: the accrual job adds one entry per worker and
+# completed month (VACATION_DAYS_PER_MONTH, prorated for the first month),
+# usage, liquidation payouts and adjustments subtract days. vacation_balances
+# holds the running totals, so dashboards read one row instead of recomputing
+# from start_date.
+
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def accrual_months(start_date: date, accrued_through: Optional[date], as_of: date) -> List[Tuple[date, float]]:
+    """
+    (month end, days) for every month after accrued_through (or since the
+    start_date month) that ended before as_of. Days before start_date don't count.
+    """
+    month = accrued_through + timedelta(days=1) if accrued_through else start_date.replace(day=1)
+    months = []
+    while True:
+        end = _month_end(month)
+        if end >= as_of:
+            break
+        worked = (end - max(month, start_date)).days + 1
+        if worked > 0:
+            months.append((end, settings.VACATION_DAYS_PER_MONTH * worked / end.day))
+        month = end + timedelta(days=1)
+    return months
+
+
+def accrue_vacations(db: Session, as_of: Optional[date] = None) -> int:
+    """
+    Adds the accrual entries of every active worker up to the last month that
+    ended before as_of (scheduled job): one query for workers and balances, one
+    INSERT for the entries, one executemany for the balances. Months already
+    accrued are skipped, so running it again is a no-op.
+
+    :return: Number of ledger entries added
+    """
+    as_of = as_of or date.today()
+    workers = db.query(User.id, User.start_date, VacationBalance.user_id, VacationBalance.accrued_through)\
+        .outerjoin(VacationBalance, VacationBalance.user_id == User.id)\
+        .filter(
+            User.role.in_(["worker", "supervisor"]),
+            User.status == "active",
+            User.start_date.isnot(None)
+        ).all()
+
+    entries, updates, inserts = [], [], []
+    for user_id, start_date, balance_user_id, accrued_through in workers:
+        months = accrual_months(start_date, accrued_through, as_of)
+        if not months:
+            continue
+        entries.extend({"user_id": user_id, "kind": "accrual", "date": end, "days": days} for end, days in months)
+        row = {"b_user_id": user_id, "b_days": sum(days for _, days in months), "b_through": months[-1][0]}
+        (updates if balance_user_id is not None else inserts).append(row)
+
+    if entries:
+        db.execute(insert(VacationEntry), entries)
+    table = VacationBalance.__table__
+    if updates:
+        db.execute(
+            update(table).where(table.c.user_id == bindparam("b_user_id")).values(
+                days_accrued=table.c.days_accrued + bindparam("b_days"),
+                balance=table.c.balance + bindparam("b_days"),
+                accrued_through=bindparam("b_through")
+            ),
+            updates
+        )
+    if inserts:
+        db.execute(table.insert(), [
+            {"user_id": row["b_user_id"], "days_accrued": row["b_days"], "days_used": 0.0, "balance": row["b_days"], "accrued_through": row["b_through"]}
+            for row in inserts
+        ])
+    db.commit()
+    return len(entries)
+
+
+def _apply_usage(db: Session, user_id: int, days: float):
+    # Relative UPDATE so concurrent writers don't lose days; negative days give them back
+    updated = db.query(VacationBalance).filter(VacationBalance.user_id == user_id).update({
+        VacationBalance.days_used: VacationBalance.days_used + days,
+        VacationBalance.balance: VacationBalance.balance - days
+    }, synchronize_session=False)
+    if not updated:
+        db.add(VacationBalance(user_id=user_id, days_accrued=0.0, days_used=days, balance=-days))
+
+
+def record_vacation_usage(
+    db: Session,
+    user_id: int,
+    day: date,
+    days: float,
+    kind: str = "usage",
+    notes: Optional[str] = None,
+    created_by_id: Optional[int] = None
+) -> VacationEntry:
+    """
+    Days taken (usage), paid out (payout) or written off (adjustment).
+    The caller is responsible for committing.
+    """
+    entry = VacationEntry(user_id=user_id, kind=kind, date=day, days=-days, notes=notes, created_by_id=created_by_id)
+    db.add(entry)
+    _apply_usage(db, user_id, days)
+    db.flush()
+    return entry
+
+
+def delete_vacation_entry(db: Session, entry: VacationEntry):
+    """Removes a usage entry and gives its days back. The caller is responsible for committing."""
+    _apply_usage(db, entry.user_id, entry.days)
+    db.delete(entry)
+
+
+def settle_vacations(db: Session, user_id: int, day: date, days_paid: float, created_by_id: Optional[int] = None):
+    """
+    Records a liquidation and closes the ledger at exactly zero: days the payout
+    includes beyond the balance (accruing since the last month end) are accrued
+    first, days it leaves over are written off as an adjustment. accrued_through
+    moves to day, so a rehired worker accrues from the new start date only.
+    The caller is responsible for committing.
+    """
+    balance = db.get(VacationBalance, user_id)
+    if balance is None:
+        balance = VacationBalance(user_id=user_id, days_accrued=0.0, days_used=0.0, balance=0.0)
+        db.add(balance)
+    difference = days_paid - (balance.balance or 0.0)
+    if difference > 0:
+        db.add(VacationEntry(user_id=user_id, kind="accrual", date=day, days=difference, notes="Proporcional a la liquidación", created_by_id=created_by_id))
+        balance.days_accrued = (balance.days_accrued or 0.0) + difference
+        balance.balance = (balance.balance or 0.0) + difference
+    balance.accrued_through = day
+    db.flush()
+
+    if days_paid > 0:
+        record_vacation_usage(db, user_id, day, days_paid, kind="payout", notes="Liquidación", created_by_id=created_by_id)
+    if difference < 0:
+        record_vacation_usage(db, user_id, day, -difference, kind="adjustment", notes="Saldo cerrado por la liquidación", created_by_id=created_by_id)
+
+
+def vacation_balances(db: Session, user_ids: Optional[Iterable[int]] = None) -> Dict[int, VacationBalance]:
+    query = db.query(VacationBalance)
+    if user_ids is not None:
+        query = query.filter(VacationBalance.user_id.in_(list(user_ids)))
+    return {balance.user_id: balance for balance in query}
+
+
+def vacation_entries(db: Session, user_id: int, limit: Optional[int] = None) -> List[VacationEntry]:
+    query = db.query(VacationEntry).filter(VacationEntry.user_id == user_id)\
+        .order_by(VacationEntry.date.desc(), VacationEntry.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
@@ -0,0 +1,70 @@
+"""
+/calendar/events over a ~10k event range (admin view: every crew, every day).
+
+Sequential requests in-process; reports latency percentiles, response size and
+whether p95 meets --target-ms (exit code 1 if not). With --revalidate every
+request carries the ETag of the first response, i.e. the browser re-fetching an
+unchanged range (expects 304s).
+
+Usage (from the repo root): python benchmarks/bench_calendar_events.py [--workers 120 --days 90] [--revalidate]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, percentile, BENCH_START
+
+import httpx
+
+
+async def run(app, path, runs, warmup, revalidate):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await login(client, "admin")
+        first = await client.get(path)
+        events, size = len(first.json()), len(first.content)
+        headers = {"If-None-Match": first.headers["etag"]} if revalidate else {}
+        expected = 304 if revalidate else 200
+        samples = []
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            elapsed = (time.perf_counter() - start) * 1000
+            if resp.status_code != expected:
+                raise RuntimeError(f"GET {path} -> {resp.status_code}")
+            if i >= warmup:
+                samples.append(elapsed)
+            size = len(resp.content)
+    return samples, events, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of /calendar/events for a large range")
+    parser.add_argument("--workers", type=int, default=120)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--days", type=int, default=90, help="workers x days = events")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--target-ms", type=float, default=500.0, help="p95 target")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match (304 path)")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.workers} workers x {args.days} days...")
+    seed(workers=args.workers, projects=args.projects, days=args.days, invoices_per_project=2)
+
+    from app.main import app
+
+    path = f"/calendar/events?start={BENCH_START}&end={BENCH_START + timedelta(days=args.days)}"
+    samples, events, size = asyncio.run(run(app, path, args.runs, args.warmup, args.revalidate))
+
+    print(f"{events} events, {size / 1024:.0f} KiB per response")
+    print(latency_summary("calendar events (304)" if args.revalidate else "calendar events", samples))
+    p95 = percentile(samples, 95)
+    ok = p95 <= args.target_ms
+    print(f"[{'OK' if ok else 'FAIL'}] p95 {p95:.0f}ms (target {args.target_ms:.0f}ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Latency of light requests while heavy reports run on the same worker.
+
+Runs the app in-process (httpx + ASGITransport, one event loop, like a single
+uvicorn worker). Light requests are a worker loading one day of calendar events;
+heavy requests are the admin dashboard, finance dashboard, payroll approval and a
+full-range calendar fetch. If a route blocks the event loop, the light p99 grows
+with the heavy load.
+
+Usage (from the repo root): python benchmarks/bench_concurrency.py [--workers 80 --days 90 ...]
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, BENCH_START
+
+import httpx
+
+HEAVY_PATHS = [
+    "/dashboard/",
+    "/finance/",
+    "/payroll/approval",
+    "/calendar/events?start={start}&end={end}",
+]
+
+
+async def timed_get(client, path, samples, scheduled=None):
+    start = time.perf_counter()
+    resp = await client.get(path)
+    samples.append((time.perf_counter() - (scheduled or start)) * 1000)
+    if resp.status_code >= 400:
+        raise RuntimeError(f"GET {path} -> {resp.status_code}")
+
+
+async def light_loop(client, path, samples, stop, interval):
+    # Fixed send schedule, latency measured from the *scheduled* time: a request that
+    # couldn't even be sent because the loop was blocked still counts the wait.
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await timed_get(client, path, samples, scheduled)
+        scheduled += interval
+
+
+async def heavy_loop(client, paths, samples, stop, pause):
+    i = 0
+    while not stop.is_set():
+        await timed_get(client, paths[i % len(paths)], samples)
+        i += 1
+        await asyncio.sleep(pause)
+
+
+async def run_phase(app, heavy_clients, light_clients, duration, light_path, heavy_paths, interval, heavy_pause):
+    transport = httpx.ASGITransport(app=app)
+    stop = asyncio.Event()
+    light_samples, heavy_samples = [], []
+    light = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(light_clients)]
+    heavy = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(heavy_clients)]
+    try:
+        # Log everyone in first so password hashing doesn't land inside the measurement
+        for i, client in enumerate(light):
+            await login(client, f"worker{i}")
+        for client in heavy:
+            await login(client, "admin")
+
+        tasks = [asyncio.create_task(light_loop(c, light_path, light_samples, stop, interval)) for c in light]
+        tasks += [asyncio.create_task(heavy_loop(c, heavy_paths, heavy_samples, stop, heavy_pause)) for c in heavy]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    finally:
+        for client in light + heavy:
+            await client.aclose()
+    return light_samples, heavy_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50/p99 of light requests under mixed heavy load")
+    parser.add_argument("--workers", type=int, default=80)
+    parser.add_argument("--projects", type=int, default=30)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--invoices", type=int, default=40, help="Invoices per project")
+    parser.add_argument("--light-clients", type=int, default=8)
+    parser.add_argument("--heavy-clients", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between requests of one light client")
+    parser.add_argument("--heavy-pause", type=float, default=0.5, help="Think time between heavy requests")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.workers} workers x {args.days} days, {args.projects} projects...")
+    seed(workers=args.workers, projects=args.projects, days=args.days, invoices_per_project=args.invoices)
+
+    from app.main import app
+
+    day = BENCH_START + timedelta(days=args.days // 2)
+    light_path = f"/calendar/events?start={day}&end={day + timedelta(days=1)}"
+    heavy_paths = [p.format(start=BENCH_START, end=BENCH_START + timedelta(days=args.days)) for p in HEAVY_PATHS]
+
+    # Both phases share one loop: pooled async connections belong to the loop that opened them
+    async def run_all():
+        idle, _ = await run_phase(app, 0, args.light_clients, args.duration, light_path, heavy_paths, args.interval, args.heavy_pause)
+        loaded, heavy = await run_phase(app, args.heavy_clients, args.light_clients, args.duration, light_path, heavy_paths, args.interval, args.heavy_pause)
+        return idle, loaded, heavy
+
+    idle, loaded, heavy = asyncio.run(run_all())
+
+    print(latency_summary("light, idle", idle))
+    print(latency_summary("light, under heavy load", loaded))
+    print(latency_summary("heavy", heavy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+POST /payroll/hours/confirm-batch-update with --items schedules in one request
+(a supervisor approving a crew's week(s) at once).
+
+Every run sends the same ids with different hours. Reports latency percentiles,
+queries per request (Server-Timing) and whether p95 meets --target-ms
+(exit code 1 if not).
+
+Usage (from the repo root): python benchmarks/bench_hours_batch.py [--items 5000 --user supervisor]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+
+from common import seed, login, latency_summary, percentile
+
+import httpx
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+
+async def run(app, username, ids, runs, warmup):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await login(client, username)
+        samples, queries = [], []
+        for i in range(warmup + runs):
+            body = [{"id": schedule_id, "hours": 8.0 + (i % 3), "overtime": float(i % 2)} for schedule_id in ids]
+            start = time.perf_counter()
+            resp = await client.post("/payroll/hours/confirm-batch-update", json=body)
+            elapsed = (time.perf_counter() - start) * 1000
+            if resp.status_code != 200:
+                raise RuntimeError(f"POST /payroll/hours/confirm-batch-update -> {resp.status_code}: {resp.text[:200]}")
+            if i >= warmup:
+                samples.append(elapsed)
+                match = _queries.search(resp.headers.get("server-timing", ""))
+                if match:
+                    queries.append(int(match.group(1)))
+    return samples, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of batch hours approval")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--user", default="supervisor", choices=["supervisor", "admin"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--target-ms", type=float, default=1000.0, help="p95 target")
+    args = parser.parse_args()
+
+    days = -(-args.items // args.workers)
+    print(f"Seeding {args.workers} workers x {days} days...")
+    seed(workers=args.workers, projects=args.projects, days=days, invoices_per_project=0)
+
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.db.models.schedule import ProjectSchedule
+
+    with SessionLocal() as db:
+        ids = [schedule_id for schedule_id, in db.query(ProjectSchedule.id).order_by(ProjectSchedule.id).limit(args.items)]
+
+    samples, queries = asyncio.run(run(app, args.user, ids, args.runs, args.warmup))
+
+    print(latency_summary(f"batch update ({len(ids)} items)", samples))
+    if queries:
+        print(f"queries per request: {min(queries)}-{max(queries)}")
+    p95 = percentile(samples, 95)
+    ok = p95 <= args.target_ms
+    print(f"[{'OK' if ok else 'FAIL'}] p95 {p95:.0f}ms (target {args.target_ms:.0f}ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
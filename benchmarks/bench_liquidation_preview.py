@@ -0,0 +1,94 @@
+"""
+Year-end provisioning: GET /liquidation/preview (every active worker in one
+request) against one GET /liquidation/preview/{id} per worker, which is what
+provisioning took before the batch endpoint.
+
+Half the crew gets a PayrollPayment history so both salary-due branches run.
+Reports latency percentiles and queries per request (Server-Timing).
+
+Usage (from the repo root): python benchmarks/bench_liquidation_preview.py [--workers 1000]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, BENCH_START
+
+import httpx
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+
+def _query_count(resp):
+    match = _queries.search(resp.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+async def run(app, worker_ids, calc_date, runs, warmup):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await login(client, "admin")
+        batch, per_worker, batch_queries, single_queries = [], [], [], []
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            resp = await client.get("/liquidation/preview", params={"calculation_date": calc_date})
+            elapsed = (time.perf_counter() - start) * 1000
+            if resp.status_code != 200:
+                raise RuntimeError(f"GET /liquidation/preview -> {resp.status_code}: {resp.text[:200]}")
+            if i >= warmup:
+                batch.append(elapsed)
+                batch_queries.append(_query_count(resp))
+
+            queries = 0
+            start = time.perf_counter()
+            for user_id in worker_ids:
+                resp = await client.get(f"/liquidation/preview/{user_id}", params={"calculation_date": calc_date})
+                if resp.status_code != 200:
+                    raise RuntimeError(f"GET /liquidation/preview/{user_id} -> {resp.status_code}: {resp.text[:200]}")
+                queries += _query_count(resp)
+            elapsed = (time.perf_counter() - start) * 1000
+            if i >= warmup:
+                per_worker.append(elapsed)
+                single_queries.append(queries)
+    return batch, per_worker, batch_queries, single_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch liquidation preview vs one request per worker")
+    parser.add_argument("--workers", type=int, default=1000)
+    parser.add_argument("--payments", type=int, default=12, help="payments per paid worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.workers} workers...")
+    seed(workers=args.workers, projects=10, days=1, invoices_per_project=0)
+
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.db.models.user import User
+    from app.db.models.payment import PayrollPayment
+
+    with SessionLocal() as db:
+        worker_ids = [user_id for user_id, in db.query(User.id).filter(User.role == "worker").order_by(User.id)]
+        db.add_all([
+            PayrollPayment(user_id=user_id, amount=100000.0, date=BENCH_START - timedelta(days=15 * k))
+            for user_id in worker_ids[::2]
+            for k in range(args.payments)
+        ])
+        db.commit()
+
+    calc_date = (BENCH_START + timedelta(days=30)).isoformat()
+    batch, per_worker, batch_queries, single_queries = asyncio.run(run(app, worker_ids, calc_date, args.runs, args.warmup))
+
+    print(latency_summary(f"batch preview ({len(worker_ids)} workers)", batch))
+    print(latency_summary(f"{len(worker_ids)} single previews", per_worker))
+    if batch_queries:
+        print(f"queries: batch {max(batch_queries)}, per worker total {max(single_queries)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Login throughput and the latency other users see during a login burst
+(shift start: every worker logs in within a few seconds).
+
+In-process, one event loop. Light clients (already logged in) fetch one day of
+calendar events on a fixed schedule while `--logins` workers log in with at most
+`--concurrency` logins in flight.
+
+Usage (from the repo root): python benchmarks/bench_login.py [--logins 200 --concurrency 50]
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, BENCH_START, BENCH_PASSWORD
+from bench_concurrency import light_loop
+
+import httpx
+
+
+async def login_burst(transport, usernames, concurrency, samples):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(username):
+        async with semaphore:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                start = time.perf_counter()
+                resp = await client.post("/login", data={"user": username, "pass": BENCH_PASSWORD})
+                samples.append((time.perf_counter() - start) * 1000)
+                if resp.status_code != 303 or "error" in resp.headers.get("location", ""):
+                    raise RuntimeError(f"Login failed for {username}")
+
+    await asyncio.gather(*(one(u) for u in usernames))
+
+
+async def run(app, args, light_path):
+    transport = httpx.ASGITransport(app=app)
+    light = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(args.light_clients)]
+    try:
+        for i, client in enumerate(light):
+            await login(client, f"worker{i}")
+
+        stop = asyncio.Event()
+        light_samples, login_samples = [], []
+        tasks = [asyncio.create_task(light_loop(c, light_path, light_samples, stop, args.interval)) for c in light]
+
+        start = time.perf_counter()
+        await login_burst(transport, [f"worker{i}" for i in range(args.logins)], args.concurrency, login_samples)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await asyncio.gather(*tasks)
+    finally:
+        for client in light:
+            await client.aclose()
+    return elapsed, login_samples, light_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logins/sec and request latency during a login burst")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once")
+    parser.add_argument("--light-clients", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between requests of one light client")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.logins} workers...")
+    seed(workers=max(args.logins, args.light_clients), projects=10, days=7, invoices_per_project=2)
+
+    from app.main import app
+    from app.core.config import settings
+
+    day = BENCH_START + timedelta(days=3)
+    light_path = f"/calendar/events?start={day}&end={day + timedelta(days=1)}"
+
+    elapsed, logins, light = asyncio.run(run(app, args, light_path))
+
+    print(f"bcrypt rounds={getattr(settings, 'BCRYPT_ROUNDS', 12)}")
+    print(f"{len(logins)} logins in {elapsed:.2f}s = {len(logins) / elapsed:.1f} logins/sec")
+    print(latency_summary("login", logins))
+    print(latency_summary("light, during burst", light))
+
+
+if __name__ == "__main__":
+    main()
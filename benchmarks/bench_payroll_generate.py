@@ -0,0 +1,76 @@
+"""
+POST /payroll/generate for a full crew: --workers x --days confirmed schedules
+(~80% confirmed by the seed).
+
+Each run generates a new draft period over the same range (wait=true, so the
+request returns once the job has built it). Reports latency
+percentiles, queries per run (Server-Timing) and whether p95 meets --target-ms
+(exit code 1 if not).
+
+Usage (from the repo root): python benchmarks/bench_payroll_generate.py [--workers 200 --days 30]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, percentile, BENCH_START
+
+import httpx
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+
+async def run(app, body, runs, warmup):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await login(client, "admin")
+        samples, queries = [], []
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            resp = await client.post("/payroll/generate", json=body)
+            elapsed = (time.perf_counter() - start) * 1000
+            if resp.status_code != 200:
+                raise RuntimeError(f"POST /payroll/generate -> {resp.status_code}: {resp.text[:200]}")
+            if i >= warmup:
+                samples.append(elapsed)
+                match = _queries.search(resp.headers.get("server-timing", ""))
+                if match:
+                    queries.append(int(match.group(1)))
+    return samples, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of payroll generation")
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--target-ms", type=float, default=500.0, help="p95 target")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.workers} workers x {args.days} days...")
+    seed(workers=args.workers, projects=args.projects, days=args.days, invoices_per_project=0)
+
+    from app.main import app
+
+    body = {
+        "start_date": BENCH_START.isoformat(),
+        "end_date": (BENCH_START + timedelta(days=args.days - 1)).isoformat(),
+        "wait": True, # Measure the generation itself, not just the enqueue
+    }
+    samples, queries = asyncio.run(run(app, body, args.runs, args.warmup))
+
+    print(latency_summary("payroll generate", samples))
+    if queries:
+        print(f"queries per run: {min(queries)}-{max(queries)}")
+    p95 = percentile(samples, 95)
+    ok = p95 <= args.target_ms
+    print(f"[{'OK' if ok else 'FAIL'}] p95 {p95:.0f}ms (target {args.target_ms:.0f}ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+POST /calendar/schedule for long ranges: one-year assignments for several workers.
+
+Default mode sends one request per worker (what the calendar form does);
+--multi sends every worker in a single request (user_id repeated). Each round
+uses a fresh year so rounds never overlap. Reports per-request latency, the
+queries per request (from Server-Timing) and schedules inserted per second.
+
+Usage (from the repo root): python benchmarks/bench_schedule_create.py [--workers 10 --days 365] [--multi]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import timedelta
+
+from common import seed, login, latency_summary, BENCH_START
+
+import httpx
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+
+async def run(app, args):
+    tasks_json = json.dumps([{"title": f"Tarea {i}", "description": "Benchmark"} for i in range(args.tasks)])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        await login(client, "admin")
+        worker_ids = list(range(3, 3 + args.workers)) # admin=1, supervisor=2, then the crew
+        samples, queries, rounds = [], [], []
+        for r in range(args.rounds):
+            start = BENCH_START + timedelta(days=366 * (r + 1))
+            form = {
+                "project_id": "1",
+                "date": start.isoformat(),
+                "end_date": (start + timedelta(days=args.days - 1)).isoformat(),
+                "tasks_json": tasks_json,
+            }
+            batches = [worker_ids] if args.multi else [[w] for w in worker_ids]
+            round_start = time.perf_counter()
+            for batch in batches:
+                t0 = time.perf_counter()
+                resp = await client.post("/calendar/schedule", data={**form, "user_id": [str(w) for w in batch]})
+                samples.append((time.perf_counter() - t0) * 1000)
+                if resp.status_code != 200:
+                    raise RuntimeError(f"POST /calendar/schedule -> {resp.status_code}: {resp.text[:200]}")
+                match = _queries.search(resp.headers.get("server-timing", ""))
+                if match:
+                    queries.append(int(match.group(1)))
+            rounds.append((time.perf_counter() - round_start) * 1000)
+    return samples, queries, rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk schedule creation over long ranges")
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tasks", type=int, default=3, help="tasks per schedule")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--multi", action="store_true", help="all workers in one request")
+    args = parser.parse_args()
+
+    seed(workers=args.workers, projects=5, days=1, invoices_per_project=0)
+
+    from app.main import app
+
+    samples, queries, rounds = asyncio.run(run(app, args))
+
+    per_round = args.workers * args.days
+    print(f"{per_round} schedules ({args.workers} workers x {args.days} days), {per_round * args.tasks} tasks per round")
+    print(latency_summary("create (multi)" if args.multi else "create (per worker)", samples))
+    if queries:
+        print(f"queries per request: {min(queries)}-{max(queries)}")
+    best = min(rounds)
+    print(f"round: best {best:.0f}ms, {per_round / (best / 1000):.0f} schedules/s")
+
+
+if __name__ == "__main__":
+    main()
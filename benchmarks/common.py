@@ -0,0 +1,142 @@
+import os
+import sys
+import random
+import tempfile
+from datetime import date, timedelta
+
+# Benchmarks run against a throwaway SQLite file, never the real sql_app.db.
+# Must happen before anything imports app.core.config.
+BENCH_DB_PATH = os.path.join(tempfile.gettempdir(), "tomatocr_bench.db")
+os.environ.setdefault("SQLITE_DB_PATH", BENCH_DB_PATH)
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+# Add repo root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = "bench"
+BENCH_START = date(2025, 1, 1)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[k]
+
+
+def latency_summary(label, samples_ms):
+    return (f"{label:<28} n={len(samples_ms):<6} "
+            f"p50={percentile(samples_ms, 50):8.1f}ms "
+            f"p95={percentile(samples_ms, 95):8.1f}ms "
+            f"p99={percentile(samples_ms, 99):8.1f}ms "
+            f"max={max(samples_ms) if samples_ms else 0:8.1f}ms")
+
+
+def reset_database():
+    """Deletes the benchmark DB (and its WAL files) and recreates the schema."""
+    path = os.environ["SQLITE_DB_PATH"]
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    from app.db.session import engine
+    from app.db.base import Base # Imports all models so they are registered
+    Base.metadata.create_all(bind=engine)
+
+
+def seed(workers=50, projects=20, days=60, invoices_per_project=10, seed_value=42):
+    """
+    Fills the benchmark DB with users, projects with budgets and invoices, and one
+    schedule (with one task) per worker per day starting at BENCH_START.
+    Users: 'admin', 'supervisor' and worker0..workerN, all with BENCH_PASSWORD.
+    """
+    from app.db.session import SessionLocal
+    from app.db.models.user import User
+    from app.db.models.project import Project
+    from app.db.models.finance import ProjectBudget, BudgetLine, Invoice, Payment, InvoiceStatus
+    from app.db.models.schedule import ProjectSchedule, ScheduleTask
+    from app.core.security import get_password_hash
+
+    rng = random.Random(seed_value)
+    reset_database()
+    db = SessionLocal()
+    try:
+        hashed = get_password_hash(BENCH_PASSWORD)
+        admin = User(username="admin", hashed_password=hashed, role="admin", full_name="Bench Admin")
+        supervisor = User(username="supervisor", hashed_password=hashed, role="supervisor", full_name="Bench Supervisor")
+        crew = [
+            User(
+                username=f"worker{i}",
+                hashed_password=hashed,
+                role="worker",
+                full_name=f"Worker {i}",
+                hourly_rate=2000 + rng.randint(0, 1500),
+                monthly_salary=450000,
+                start_date=BENCH_START - timedelta(days=rng.randint(30, 2000)),
+                apply_deductions=bool(i % 2),
+            )
+            for i in range(workers)
+        ]
+        db.add_all([admin, supervisor] + crew)
+        db.flush()
+
+        project_rows = []
+        for p in range(projects):
+            project = Project(name=f"Proyecto {p}", is_active=True)
+            project.users = [supervisor] + crew[p::projects]
+            db.add(project)
+            db.flush()
+            project_rows.append(project)
+
+            budget = ProjectBudget(project_id=project.id, licitation_number=f"LIC-{p}")
+            db.add(budget)
+            db.flush()
+            lines = [BudgetLine(budget_id=budget.id, name=f"Linea {k}", subtotal=1_000_000.0 * (k + 1), tax_percentage=13.0) for k in range(4)]
+            db.add_all(lines)
+            db.flush()
+
+            for k in range(invoices_per_project):
+                issue = BENCH_START + timedelta(days=rng.randint(0, days))
+                invoice = Invoice(
+                    budget_id=budget.id,
+                    budget_line_id=lines[k % len(lines)].id,
+                    invoice_number=f"F-{p}-{k}",
+                    issue_date=issue,
+                    due_date=issue + timedelta(days=30),
+                    amount=float(rng.randint(10, 500) * 1000),
+                    status=InvoiceStatus.PENDING,
+                )
+                db.add(invoice)
+                if k % 3 == 0:
+                    db.flush()
+                    db.add(Payment(invoice_id=invoice.id, payment_date=issue + timedelta(days=10), amount=invoice.amount))
+                    invoice.status = InvoiceStatus.PAID
+        db.flush()
+
+        for i, worker in enumerate(crew):
+            for d in range(days):
+                schedule = ProjectSchedule(
+                    project_id=project_rows[(i + d) % projects].id,
+                    user_id=worker.id,
+                    date=BENCH_START + timedelta(days=d),
+                    hours_worked=8.0,
+                    overtime_hours=float(rng.randint(0, 2)),
+                    is_confirmed=rng.random() < 0.8,
+                )
+                schedule.tasks = [ScheduleTask(title="Tarea", description="Benchmark")]
+                db.add(schedule)
+            db.flush()
+
+        db.commit()
+    finally:
+        db.close()
+
+
+async def login(client, username):
+    """Logs an httpx AsyncClient in; the session cookie stays on the client."""
+    resp = await client.post("/login", data={"user": username, "pass": BENCH_PASSWORD})
+    if resp.status_code != 303:
+        raise RuntimeError(f"Login failed for {username}: {resp.status_code}")
+    return client
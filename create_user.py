@@ -5,7 +5,7 @@ from app.db.models.user import User
 from app.db.models.project import Project # Needed for mapper registry
 from app.db.models.log import DailyLog # Needed for mapper registry
 from app.db.models.schedule import ProjectSchedule # Needed for mapper registry
-from app.core.security import get_password_hash
+from app.core.security import hash_passwords
 
 def create_initial_data():
     # Create Tables
@@ -14,53 +14,32 @@ def create_initial_data():
     
     db = SessionLocal()
 
-    # Admin User
-    admin = db.query(User).filter(User.username == "admin").first()
-    if not admin:
-        print("Creating admin user...")
-        admin = User(
-            username="admin",
-            hashed_password=get_password_hash("admin123"),
-            full_name="Admin User",
-            role="admin"
-        )
-        db.add(admin)
-        db.commit()
-        print("Admin user created.")
-    else:
-        print("Admin user already exists.")
-    
-    # Client User
-    client = db.query(User).filter(User.username == "client").first()
-    if not client:
-        print("Creating client user...")
-        client = User(
-            username="client",
-            hashed_password=get_password_hash("client123"),
-            full_name="Test Client",
-            role="client"
-        )
-        db.add(client)
-        db.commit()
-        print("Client user created.")
-    else:
-        print("Client user already exists.")
+    default_users = [
+        # username, password, full_name, role
+        ("admin", "admin123", "Admin User", "admin"),
+        ("client", "client123", "Test Client", "client"),
+        ("worker", "worker123", "Test Worker", "worker"),
+    ]
+
+    missing = []
+    for username, password, full_name, role in default_users:
+        if db.query(User).filter(User.username == username).first():
+            print(f"{username.capitalize()} user already exists.")
+        else:
+            missing.append((username, password, full_name, role))
 
-    # Worker User
-    worker = db.query(User).filter(User.username == "worker").first()
-    if not worker:
-        print("Creating worker user...")
-        worker = User(
-            username="worker",
-            hashed_password=get_password_hash("worker123"),
-            full_name="Test Worker",
-            role="worker"
-        )
-        db.add(worker)
+    # bcrypt is slow on purpose, hash all missing users in parallel
+    hashes = hash_passwords([password for _, password, _, _ in missing])
+    for (username, _, full_name, role), hashed in zip(missing, hashes):
+        print(f"Creating {username} user...")
+        db.add(User(
+            username=username,
+            hashed_password=hashed,
+            full_name=full_name,
+            role=role
+        ))
         db.commit()
-        print("Worker user created.")
-    else:
-        print("Worker user already exists.")
+        print(f"{username.capitalize()} user created.")
 
     db.close()
 
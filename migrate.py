@@ -0,0 +1,21 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from app.db.session import engine
+from app.db.base import Base # Imports all models so they are registered
+from app.db.migrations import run_migrations
+
+def migrate():
+    print("Creating missing tables...")
+    Base.metadata.create_all(bind=engine)
+
+    applied = run_migrations(engine)
+    if applied:
+        print(f"Applied migrations: {applied}")
+    else:
+        print("Database is up to date.")
+
+if __name__ == "__main__":
+    migrate()
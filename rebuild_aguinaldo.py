@@ -0,0 +1,42 @@
+import sys
+import os
+import argparse
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.db.session import SessionLocal, engine
+from app.db.base import Base # Imports all models so they are registered
+from app.utils.aguinaldo import rebuild_accruals
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify aguinaldo_accruals from finalized payrolls")
+    parser.add_argument("--verify", action="store_true", help="Only report drift, don't write")
+    args = parser.parse_args()
+
+    # Make sure the accrual table exists on older databases
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        drift = rebuild_accruals(db, verify_only=args.verify)
+    finally:
+        db.close()
+
+    if not drift:
+        print("No drift found. Accruals match finalized payroll entries.")
+        return 0
+
+    print(f"Found {len(drift)} drifted value(s):")
+    for d in drift:
+        print(f"  user {d['user_id']} year {d['year']}: {d['field']} stored={d['stored']} actual={d['actual']}")
+
+    if args.verify:
+        print("Run without --verify to rebuild.")
+        return 1
+
+    print("Accruals rebuilt.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
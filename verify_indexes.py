@@ -0,0 +1,64 @@
+import sys
+import os
+from sqlalchemy import text
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.db.session import engine
+
+# (expected index, hot query) - shapes taken from the routers that issue them
+HOT_QUERIES = [
+    ("ix_daily_logs_project_date_created",
+     "SELECT * FROM daily_logs WHERE project_id = :id ORDER BY date DESC, created_at DESC LIMIT 10"),
+    ("ix_invoices_budget_status_due",
+     "SELECT * FROM invoices WHERE budget_id = :id AND status = 'PENDING' AND due_date < :d"),
+    ("ix_invoices_issue_date",
+     "SELECT * FROM invoices WHERE issue_date >= :d AND issue_date <= :d2"),
+    ("ix_project_schedules_user_date",
+     "SELECT * FROM project_schedules WHERE user_id = :id AND date >= :d AND date <= :d2"),
+    ("ix_project_schedules_project_date_confirmed",
+     "SELECT * FROM project_schedules WHERE project_id = :id AND date >= :d AND date <= :d2 AND is_confirmed = 1"),
+    ("ix_project_schedules_unconfirmed_date",
+     "SELECT * FROM project_schedules WHERE date >= :d AND date <= :d2 AND is_confirmed = 0 "
+     "ORDER BY date DESC, user_id, id LIMIT 501"),
+    ("ix_payroll_entries_period_user",
+     "SELECT * FROM payroll_entries WHERE payroll_period_id = :id AND user_id = :id2"),
+    ("ix_payroll_payments_user_date",
+     "SELECT * FROM payroll_payments WHERE user_id = :id ORDER BY date DESC LIMIT 1"),
+    ("ix_activity_logs_created_at",
+     "SELECT * FROM activity_logs ORDER BY created_at DESC LIMIT 50"),
+    ("ix_project_users_user_id",
+     "SELECT project_id FROM project_users WHERE user_id = :id"),
+]
+
+PARAMS = {"id": 1, "id2": 1, "d": "2025-01-01", "d2": "2025-12-31"}
+
+def query_plan(conn, sql):
+    if engine.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), PARAMS).fetchall()
+        return [row[-1] for row in rows]
+    # MySQL: the chosen index is in the `key` column
+    rows = conn.execute(text(f"EXPLAIN {sql}"), PARAMS).mappings().fetchall()
+    return [f"{row['table']}: key={row['key']}" for row in rows]
+
+def verify_indexes():
+    print(f"Checking query plans on {engine.dialect.name}...")
+    failures = 0
+    with engine.connect() as conn:
+        for index_name, sql in HOT_QUERIES:
+            plan = query_plan(conn, sql)
+            ok = any(index_name in step for step in plan)
+            failures += 0 if ok else 1
+            print(f"[{'OK' if ok else 'FAIL'}] {index_name}")
+            for step in plan:
+                print(f"       {step}")
+
+    if failures:
+        print(f"VERIFICATION FAILED: {failures} query(ies) not using their index. Run migrate.py first.")
+        return 1
+    print("VERIFICATION SUCCESS: every hot query uses its index.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(verify_indexes())